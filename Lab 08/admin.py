@@ -1,12 +1,92 @@
 from flask_admin import Admin
+from flask_admin.babel import lazy_gettext
 from flask_admin.contrib.sqla import ModelView
+from flask_admin.contrib.sqla.filters import (
+    BaseSQLAFilter, FilterConverter, FilterEqual, FilterInList,
+    IntEqualFilter, IntGreaterFilter, IntSmallerFilter, IntInListFilter,
+)
 from models import db, Student, Teacher, Admin as AdminUser, Course, Enrollment
-from flask import session, redirect, url_for
-from flask_admin.contrib.sqla import ModelView
-from wtforms import PasswordField
+from enrollments import adjust_enrolled_count, recount_enrolled
+from catalog import invalidate_catalog
+from flask import g, session, redirect, url_for
+from sqlalchemy import func, select
+from wtforms import HiddenField, PasswordField
+from wtforms.validators import ValidationError
 
-class StudentAdminView(ModelView):
-    form_excluded_columns = ('password_hash',)
+# ADMIN PANEL
+# Every list view names its columns, so the relations it displays are joined
+# into the list query (Flask-Admin's auto-select-related). Filters and sorting
+# are limited to indexed columns, and filters only offer comparisons an index
+# can answer (no LIKE '%...%'). For the same reason no view has Flask-Admin's
+# search box, which runs LIKE '%...%' over every searchable column: people
+# and courses are found with the 'equals' and 'starts with' filters on their
+# indexed name and email columns instead. The admin can pick a page size, and
+# views over large tables can skip the exact COUNT(*) behind the pager (see
+# approximate_count below).
+#
+# Settings (app.config):
+#   ADMIN_PAGE_SIZE            rows per list page (default 50)
+#   ADMIN_APPROXIMATE_COUNTS   estimate row counts on large tables (default True)
+
+PAGE_SIZE_OPTIONS = (20, 50, 100, 200)
+
+
+# Prefix match as a range on the column, which SQLite answers from the
+# column's index (LIKE 'x%' can't use it: LIKE ignores case, the index doesn't)
+class FilterStartsWith(BaseSQLAFilter):
+    def apply(self, query, value, alias=None):
+        column = self.get_column(alias)
+        return query.filter(column >= value, column < value + '\U0010ffff')
+
+    def operation(self):
+        return lazy_gettext('starts with')
+
+
+# Only equality, prefix, range and in-list filters - no (NOT) LIKE or != scans
+class IndexedFilterConverter(FilterConverter):
+    strings = (FilterEqual, FilterStartsWith, FilterInList)
+    int_filters = (IntEqualFilter, IntGreaterFilter, IntSmallerFilter, IntInListFilter)
+
+
+# Custom ModelView to restrict access to real admins
+class SecureModelView(ModelView):
+    filter_converter = IndexedFilterConverter()
+    can_set_page_size = True
+    page_size_options = PAGE_SIZE_OPTIONS
+    page_size = 50
+
+    # Large tables set this: an unfiltered list then estimates its size from
+    # the id range (two primary key lookups) instead of counting every row.
+    # Searches and filters still get an exact count
+    approximate_count = False
+
+    def is_accessible(self):
+        return session.get("role") == "admin"
+
+    def inaccessible_callback(self, name, **kwargs):
+        return redirect(url_for("main.admin_login"))
+
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        # get_count_query() isn't told about the search or filters, so note them
+        g.admin_list_filtered = bool(search or filters)
+        return super().get_list(page, sort_column, sort_desc, search, filters, execute, page_size)
+
+    def get_count_query(self):
+        if self.approximate_count and not g.get('admin_list_filtered'):
+            # Separate subqueries, so SQLite answers each from the end of the index
+            highest = select(func.max(self.model.id)).scalar_subquery()
+            lowest = select(func.min(self.model.id)).scalar_subquery()
+            return self.session.query(func.coalesce(highest - lowest + 1, 0))
+        return super().get_count_query()
+
+
+class StudentAdminView(SecureModelView):
+    column_list = ('id', 'name', 'email')
+    column_filters = ('name', 'email')
+    column_sortable_list = ('id', 'name', 'email')
+    approximate_count = True
+
+    form_excluded_columns = ('password_hash', 'enrollments')
     form_extra_fields = {
         'password': PasswordField('Password')
     }
@@ -16,7 +96,11 @@ class StudentAdminView(ModelView):
         if form.password.data:
             model.set_password(form.password.data)
 
-class TeacherAdminView(ModelView):
+class TeacherAdminView(SecureModelView):
+    column_list = ('id', 'name', 'email')
+    column_filters = ('name', 'email')
+    column_sortable_list = ('id', 'name', 'email')
+
     form_excluded_columns = ('password_hash',)
     form_extra_fields = {
         'password': PasswordField('Password')
@@ -27,22 +111,88 @@ class TeacherAdminView(ModelView):
         if form.password.data:
             model.set_password(form.password.data)
 
+    # Teacher names appear in the cached course catalog
+    def after_model_change(self, form, model, is_created):
+        invalidate_catalog()
+
+    def after_model_delete(self, model):
+        invalidate_catalog()
+
+class AdminUserView(SecureModelView):
+    column_list = ('id', 'username')
+    column_filters = ('username',)
+
+# Courses: enrolled_count is maintained by the app, not edited by hand
+class CourseAdminView(SecureModelView):
+    column_list = ('id', 'name', 'term', 'teacher', 'capacity', 'enrolled_count')
+    column_filters = ('name', 'term', 'capacity', 'enrolled_count', 'teacher.email')
+    column_sortable_list = ('id', 'name', 'term', 'capacity', 'enrolled_count')
+    form_excluded_columns = ('enrolled_count', 'teacher_name', 'enrollments')
+
+    def after_model_change(self, form, model, is_created):
+        invalidate_catalog()
+
+    def after_model_delete(self, model):
+        invalidate_catalog()
+
+# Enrollments: keep courses.enrolled_count in step with panel edits. This is
+# the biggest table, so it sorts by the indexed foreign keys rather than by
+# student or course name
+class EnrollmentAdminView(SecureModelView):
+    column_list = ('id', 'student', 'course', 'grade')
+    column_filters = ('student.email', 'course.name', 'course.term')
+    column_sortable_list = ('id', ('student', Enrollment.student_id), ('course', Enrollment.course_id))
+    approximate_count = True
+    # Look students and courses up as the admin types instead of rendering
+    # every one of them into a <select>
+    form_ajax_refs = {
+        'student': {'fields': ('name', 'email')},
+        'course': {'fields': ('name',)},
+    }
+    # The edit form carries the version it was rendered with, so saving it
+    # fails instead of overwriting a grade someone changed in the meantime
+    form_excluded_columns = ('version',)
+    form_extra_fields = {'loaded_version': HiddenField()}
+
+    def edit_form(self, obj=None):
+        form = super().edit_form(obj)
+        if not form.loaded_version.data:
+            form.loaded_version.data = obj.version
+        return form
+
+    def on_model_change(self, form, model, is_created):
+        loaded_version = form.loaded_version.data
+        if not is_created and loaded_version and int(loaded_version) != model.version:
+            raise ValidationError('This enrollment was changed by someone else. Reload it and try again.')
+
+        # course_id still holds the old course until the flush
+        old_course_id = model.course_id
+        db.session.flush()
+        recount_enrolled([old_course_id, model.course_id])
+
+    def on_model_delete(self, model):
+        adjust_enrolled_count(model.course_id, -1)
+
+    def after_model_change(self, form, model, is_created):
+        invalidate_catalog()
+
+    def after_model_delete(self, model):
+        invalidate_catalog()
+
 def setup_admin(app):
     
     # Give the admin a unique endpoint name to avoid blueprint conflicts
     admin = Admin(app, name="ACME University Admin", endpoint="flask_admin")  
 
-    # Custom ModelView to restrict access to real admins
-    class SecureModelView(ModelView):
-        def is_accessible(self):
-            return session.get("role") == "admin"
-
-        def inaccessible_callback(self, name, **kwargs):
-            return redirect(url_for("admin_login"))
-                
     # models
-    admin.add_view(StudentAdminView(Student, db.session, name="Students", endpoint="student_admin", category="Users"))
-    admin.add_view(TeacherAdminView(Teacher, db.session, name="Teachers", endpoint="teacher_admin", category="Users"))
-    admin.add_view(SecureModelView(AdminUser, db.session, category="Users"))
-    admin.add_view(SecureModelView(Course, db.session, category="Courses"))
-    admin.add_view(SecureModelView(Enrollment, db.session, category="Courses"))
+    views = [
+        StudentAdminView(Student, db.session, name="Students", endpoint="student_admin", category="Users"),
+        TeacherAdminView(Teacher, db.session, name="Teachers", endpoint="teacher_admin", category="Users"),
+        AdminUserView(AdminUser, db.session, category="Users"),
+        CourseAdminView(Course, db.session, category="Courses"),
+        EnrollmentAdminView(Enrollment, db.session, category="Courses"),
+    ]
+    for view in views:
+        view.page_size = app.config.get('ADMIN_PAGE_SIZE', view.page_size)
+        view.approximate_count = view.approximate_count and app.config.get('ADMIN_APPROXIMATE_COUNTS', True)
+        admin.add_view(view)
@@ -1,24 +1,145 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from models import db, Student, Teacher, Admin, Course, Enrollment
-from admin import setup_admin
+from flask import Blueprint, Flask, Response, current_app, make_response, render_template, request, jsonify, session, redirect, url_for, stream_with_context
+from models import db, Student, Teacher, Admin, Course, Enrollment, DEFAULT_TERM, current_term
+from metrics import setup_metrics
+from catalog import load_catalog, load_catalog_entry, load_catalog_page, search_catalog, invalidate_catalog, sync_catalog, catalog_cache
+from enrollments import admit_student, admit_student_batch, remove_enrollment
+from gradebook import read_grade_rows, save_grades, set_grade, set_enrollment_grade, parse_grade, parse_version, GradeConflict, export_query, EXPORT_FORMATS
+from schema import upgrade_schema
+from passwords import configure_passwords, verify_password, PasswordPoolBusy
+from sqlite_profile import configure_sqlite, write_queue
+from seat_events import seat_events
+from versions import read_stamps, page_etag, stamp_version, not_modified, with_etag
+from grade_stats import course_grade_stats, all_grade_stats, rebuild_grade_stats, NO_GRADES
+from query_plans import check_query_plans
+from roster import import_roster, ROSTER_KINDS, CHUNK_SIZE
+from terms import rollover_term, transcript, ROLLOVER_BATCH_SIZE
+from lazy_admin import setup_lazy_admin
+from surge import registration_queue, SurgeQueueFull
+from profiler import setup_profiler
+from assets import setup_assets, build_assets
+from template_cache import setup_template_cache
 from flask import redirect, url_for, session
 import os
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///university.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db.init_app(app)
-setup_admin(app)
+import codecs
+import json
+import click
+
+# Routes live on this blueprint and create_app() below builds the app around
+# it. cli_group=None keeps the CLI commands top-level (flask rollover-term)
+main = Blueprint('main', __name__, cli_group=None)
+
+# APPLICATION FACTORY
+
+def create_app(config=None):
+    """Build the application, with config overriding the environment settings.
+
+    Safe to call in a prefork server's master before it forks (for example
+    gunicorn --preload wsgi:app): no database connections or threads are left
+    open for the workers to inherit.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'your-secret-key-here'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///university.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Password hashing (see passwords.py)
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    app.config['PASSWORD_WORKERS'] = int(os.environ.get('PASSWORD_WORKERS', 4))
+    app.config['PASSWORD_QUEUE_LIMIT'] = int(os.environ.get('PASSWORD_QUEUE_LIMIT', 32))
+
+    # Requests slower than this are logged by metrics.py (None to disable)
+    app.config['SLOW_REQUEST_SECONDS'] = float(os.environ.get('SLOW_REQUEST_SECONDS', 0.5))
+
+    # Live seat-count stream limits (see seat_events.py). WORKER_THREADS is
+    # the server's threads per process (gunicorn --threads); by default only
+    # a quarter of them may hold a stream open
+    app.config['WORKER_THREADS'] = int(os.environ.get('WORKER_THREADS', 16))
+    if 'SEAT_STREAM_MAX_CLIENTS' in os.environ:
+        app.config['SEAT_STREAM_MAX_CLIENTS'] = int(os.environ['SEAT_STREAM_MAX_CLIENTS'])
+    app.config['SEAT_STREAM_MAX_SECONDS'] = int(os.environ.get('SEAT_STREAM_MAX_SECONDS', 300))
+    app.config['SEAT_WATCH_SECONDS'] = float(os.environ.get('SEAT_WATCH_SECONDS', 1.0))
+
+    # Admin-triggered request profiling (see profiler.py)
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 1.0))
+    app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+    if 'PROFILE_DIR' in os.environ:
+        app.config['PROFILE_DIR'] = os.environ['PROFILE_DIR']
+
+    # Fingerprinted, pre-compressed static assets (see assets.py)
+    app.config['ASSETS_FINGERPRINT'] = os.environ.get('ASSETS_FINGERPRINT', '1') == '1'
+    app.config['ASSETS_AUTO_BUILD'] = os.environ.get('ASSETS_AUTO_BUILD', '0') == '1'
+
+    # Shared Jinja bytecode cache and rendered table fragments (see template_cache.py)
+    if 'JINJA_BYTECODE_CACHE_DIR' in os.environ:
+        app.config['JINJA_BYTECODE_CACHE_DIR'] = os.environ['JINJA_BYTECODE_CACHE_DIR']
+    app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get('FRAGMENT_CACHE_SIZE', 20000))
+
+    # Flask-Admin panel: 'lazy' (built on first use, see lazy_admin.py),
+    # 'eager' (built here) or 'off'
+    app.config['ADMIN_PANEL'] = os.environ.get('ADMIN_PANEL', 'lazy')
+
+    # Flask-Admin list views (see admin.py)
+    app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+    app.config['ADMIN_APPROXIMATE_COUNTS'] = os.environ.get('ADMIN_APPROXIMATE_COUNTS', '1') == '1'
+
+    # Term that course listings show and new courses go into (see terms.py)
+    app.config['CURRENT_TERM'] = os.environ.get('CURRENT_TERM', DEFAULT_TERM)
+
+    # SQLite tuning and the single writer thread (see sqlite_profile.py)
+    app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'production')
+
+    # Registration surge mode: queue registrations, answer 202 (see surge.py)
+    app.config['REGISTRATION_SURGE_MODE'] = os.environ.get('REGISTRATION_SURGE_MODE', '0') == '1'
+    app.config['SURGE_QUEUE_LIMIT'] = int(os.environ.get('SURGE_QUEUE_LIMIT', 5000))
+    app.config['SURGE_BATCH_SIZE'] = int(os.environ.get('SURGE_BATCH_SIZE', 200))
+    app.config['SURGE_RESULT_SECONDS'] = int(os.environ.get('SURGE_RESULT_SECONDS', 300))
+
+    if config:
+        app.config.update(config)
+
+    configure_sqlite(app)
+    db.init_app(app)
+    configure_passwords(app)
+    registration_queue.init_app(app)
+    seat_events.init_app(app)
+    setup_metrics(app)
+    setup_profiler(app)
+    setup_assets(app)
+    setup_template_cache(app)
+    app.register_blueprint(main)
+
+    if app.config['ADMIN_PANEL'] == 'eager':
+        from admin import setup_admin
+        setup_admin(app)
+    elif app.config['ADMIN_PANEL'] == 'lazy':
+        setup_lazy_admin(app, lambda: _create_admin_panel(app.config))
+
+    with app.app_context():
+        upgrade_schema()
+        # Don't hand the startup connection down to forked workers
+        db.engine.dispose()
+
+    return app
+
+def _create_admin_panel(config):
+    """The Flask-Admin panel as an app of its own (see lazy_admin.py)"""
+    from admin import setup_admin
+
+    panel = Flask(__name__)
+    panel.config.update(config)
+    db.init_app(panel)
+    # Only so templates and redirects can url_for() the main app's pages
+    panel.register_blueprint(main)
+    setup_admin(panel)
+    return panel
 
 # AUTHENTICATION ROUTES (student, teacher, admin logins)
 
-@app.route('/')
+@main.route('/')
 def index():
-    return redirect(url_for('student_login'))
+    return redirect(url_for('main.student_login'))
 
-@app.route('/student/login', methods=['GET', 'POST'])
+@main.route('/student/login', methods=['GET', 'POST'])
 def student_login():
     if request.method == 'POST':
         email = request.form.get('studentLoginEmail')
@@ -27,22 +148,29 @@ def student_login():
         print(f"Student login attempt: {email}")
         
         student = Student.query.filter_by(email=email).first()
+
+        try:
+            valid = student is not None and verify_password(student, password)
+        except PasswordPoolBusy:
+            print("Student login rejected: password pool busy")
+            return render_template('student_login.html', error="Too many logins right now, please try again"), 503
         
-        if student and student.check_password(password):
+        if valid:
+            db.session.commit()  # saves an upgraded password hash, if any
             # Store user info in session
             session['user_id'] = student.id
             session['user_email'] = student.email
             session['user_name'] = student.name
             session['role'] = 'student'
             print(f"Student login successful: {student.name}")
-            return redirect(url_for('student_dashboard'))
+            return redirect(url_for('main.student_dashboard'))
         else:
             print("Student login failed")
             return render_template('student_login.html', error="Invalid email or password")
     
     return render_template('student_login.html')
 
-@app.route('/teacher/login', methods=['GET', 'POST'])
+@main.route('/teacher/login', methods=['GET', 'POST'])
 def teacher_login():
     if request.method == 'POST':
         email = request.form.get('username')
@@ -51,21 +179,28 @@ def teacher_login():
         print(f"Teacher login attempt: {email}")
         
         teacher = Teacher.query.filter_by(email=email).first()
+
+        try:
+            valid = teacher is not None and verify_password(teacher, password)
+        except PasswordPoolBusy:
+            print("Teacher login rejected: password pool busy")
+            return render_template('professor_login.html', error="Too many logins right now, please try again"), 503
         
-        if teacher and teacher.check_password(password):
+        if valid:
+            db.session.commit()  # saves an upgraded password hash, if any
             session['user_id'] = teacher.id
             session['user_email'] = teacher.email
             session['user_name'] = teacher.name
             session['role'] = 'teacher'
             print(f"Teacher login successful: {teacher.name}")
-            return redirect(url_for('teacher_dashboard'))
+            return redirect(url_for('main.teacher_dashboard'))
         else:
             print("Teacher login failed")
             return render_template('professor_login.html', error="Invalid email or password")
     
     return render_template('professor_login.html')
 
-@app.route('/admin/login', methods=['GET', 'POST'])
+@main.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     if request.method == 'POST':
         username = request.form.get('username')
@@ -74,51 +209,71 @@ def admin_login():
         print(f"Admin login attempt: {username}")
         
         admin = Admin.query.filter_by(username=username).first()
+
+        try:
+            valid = admin is not None and verify_password(admin, password)
+        except PasswordPoolBusy:
+            print("Admin login rejected: password pool busy")
+            return render_template('admin_login.html', error="Too many logins right now, please try again"), 503
         
-        if admin and admin.check_password(password):
+        if valid:
+            db.session.commit()  # saves an upgraded password hash, if any
             session['user_id'] = admin.id
             session['user_name'] = admin.username
             session['role'] = 'admin'
             print(f"Admin login successful: {admin.username}")
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         else:
             print("Admin login failed")
             return render_template('admin_login.html', error="Invalid username or password")
     
     return render_template('admin_login.html')
 
+# Grade writes are compare-and-swapped on the enrollment's version (see
+# gradebook.py). A client that lost the race gets 409 with the current grade
+# and version, so it can show them and let the user decide
+def _grade_conflict(conflict, **extra):
+    return jsonify({'error': str(conflict), 'grade': conflict.grade, 'version': conflict.version, **extra}), 409
+
 # Update grade
-@app.route("/api/admin/enrollments/<int:enrollment_id>", methods=["PUT"])
+@main.route("/api/admin/enrollments/<int:enrollment_id>", methods=["PUT"])
 def admin_update_grade(enrollment_id):
     data = request.json
-    new_grade = data.get("grade")
 
-    if new_grade is None:
+    if data.get("grade") is None:
         return jsonify({"success": False, "error": "Grade not provided"}), 400
 
-    enrollment = Enrollment.query.get(enrollment_id)
-    if not enrollment:
-        return jsonify({"success": False, "error": "Enrollment not found"}), 404
+    # Checked here, as the bulk uploads do: a bad value must not reach the writer
+    try:
+        new_grade = parse_grade(data.get("grade"))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "Invalid grade"}), 400
 
-    enrollment.grade = new_grade
-    db.session.commit()
+    try:
+        version = parse_version(data.get("version"))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "Invalid version"}), 400
+
+    try:
+        grade, version = write_queue.run(set_enrollment_grade, enrollment_id, new_grade, version)
+    except LookupError:
+        return jsonify({"success": False, "error": "Enrollment not found"}), 404
+    except GradeConflict as e:
+        return _grade_conflict(e, success=False)
 
     return jsonify({
         "success": True,
-        "enrollment_id": enrollment.id,
-        "grade": enrollment.grade
+        "enrollment_id": enrollment_id,
+        "grade": grade,
+        "version": version
     })
 
 # Remove student
-@app.route("/api/admin/enrollments/<int:enrollment_id>", methods=["DELETE"])
+@main.route("/api/admin/enrollments/<int:enrollment_id>", methods=["DELETE"])
 def admin_remove_student(enrollment_id):
-    enrollment = Enrollment.query.get(enrollment_id)
-    if not enrollment:
+    if not write_queue.run(remove_enrollment, enrollment_id):
         return jsonify({"success": False, "error": "Enrollment not found"}), 404
 
-    db.session.delete(enrollment)
-    db.session.commit()
-
     return jsonify({
         "success": True,
         "enrollment_id": enrollment_id
@@ -127,16 +282,22 @@ def admin_remove_student(enrollment_id):
 
 # DASHBOARD ROUTES
 
-@app.route('/student/dashboard')
+@main.route('/student/dashboard')
 def student_dashboard():
     # Check if user is logged in as student
     if 'user_id' not in session or session.get('role') != 'student':
-        return redirect(url_for('student_login'))
+        return redirect(url_for('main.student_login'))
     
     student_id = session['user_id']
     student_name = session['user_name']
     
     print(f"Loading dashboard for student: {student_name} (ID: {student_id})")
+
+    # Nothing changed since the browser's copy? Answer 304 before querying
+    etag = page_etag(f'student:{student_id}', 'courses', extra=f'{student_id}:{student_name}')
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
     # Get student's enrolled courses
     enrollments = Enrollment.query.filter_by(student_id=student_id).join(Course).all()
@@ -152,51 +313,53 @@ def student_dashboard():
     
     print(f"Student has {len(enrolled_courses)} enrolled courses")
     
-    return render_template('student_dashboard.html', 
+    return with_etag(make_response(render_template('student_dashboard.html', 
                          student_name=student_name,
-                         courses=enrolled_courses)
+                         courses=enrolled_courses)), etag)
 
-@app.route('/teacher/dashboard')
+@main.route('/teacher/dashboard')
 def teacher_dashboard():
     # Check if user is logged in as teacher
     if 'user_id' not in session or session.get('role') != 'teacher':
-        return redirect(url_for('teacher_login'))
+        return redirect(url_for('main.teacher_login'))
 
     teacher_id = session['user_id']
     teacher_name = session['user_name']
 
     print(f"Loading dashboard for teacher: {teacher_name} (ID: {teacher_id})")
 
-    # Get courses taught by this teacher
-    courses = Course.query.filter_by(teacher_id=teacher_id).all()
+    stamps = read_stamps(f'teacher:{teacher_id}', 'courses', 'seats')
+    etag = page_etag(f'teacher:{teacher_id}', 'courses', extra=f'{teacher_id}:{teacher_name}', stamps=stamps)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    sync_catalog(stamps)
 
-    # Build course data list
+    # Get courses taught by this teacher (with enrollment counts in one query)
     course_data = []
-    for course in courses:
-        enrollment_count = Enrollment.query.filter_by(course_id=course.id).count()
-
+    for course in load_catalog(teacher_id=teacher_id):
         course_data.append({
-            'id': course.id,
-            'name': course.name,
+            'id': course['id'],
+            'name': course['name'],
             'teacher_name': teacher_name,
-            'enrollment_count': enrollment_count,
-            'capacity': course.capacity
+            'enrollment_count': course['enrolled'],
+            'capacity': course['capacity']
         })
 
     print(f"Teacher has {len(course_data)} courses")
 
-    return render_template(
+    return with_etag(make_response(render_template(
         'professor_dashboard.html',
         professor_name=teacher_name,
         courses=course_data
-    )
+    )), etag)
 
 # TEACHER COURSES
 
-@app.route('/professor/course/<int:course_id>')
+@main.route('/professor/course/<int:course_id>')
 def view_course(course_id):
     if 'user_id' not in session or session.get('role') != 'teacher':
-        return redirect(url_for('teacher_login'))
+        return redirect(url_for('main.teacher_login'))
 
     teacher_id = session['user_id']
     course = Course.query.get_or_404(course_id)
@@ -205,39 +368,59 @@ def view_course(course_id):
     if course.teacher_id != teacher_id:
         return "Unauthorized", 403
 
-    # Get students enrolled in this course
-    enrollments = Enrollment.query.filter_by(course_id=course_id).join(Student).all()
-    student_data = []
-    for enrollment in enrollments:
-        student_data.append({
-            'id': enrollment.student.id,
-            'name': enrollment.student.name,
-            'grade': enrollment.grade
-        })
+    # Get students enrolled in this course. The roster table is cached per
+    # roster version (see template_cache.py), so this only runs when it changed
+    def load_students():
+        enrollments = Enrollment.query.filter_by(course_id=course_id).join(Student).all()
+        student_data = []
+        for enrollment in enrollments:
+            student_data.append({
+                'id': enrollment.student.id,
+                'name': enrollment.student.name,
+                'grade': enrollment.grade,
+                'version': enrollment.version
+            })
+        return student_data
 
     return render_template(
         'professor_course.html',
         course=course,
-        students=student_data
+        students=load_students,
+        roster_version=stamp_version(f'roster:{course_id}'),
+        stats=course_grade_stats(course_id)
     )
 
-@app.route("/admin/dashboard")
+@main.route("/admin/dashboard")
 def admin_dashboard():
     if "user_id" not in session or session.get("role") != "admin":
-        return redirect(url_for("login"))
+        return redirect(url_for("main.admin_login"))
+
+    # One keyset-paginated page of courses, sortable by column
+    sort = request.args.get("sort", "name")
+    order = request.args.get("order", "asc")
+    after = request.args.get("after")
+    limit = request.args.get("limit", 50, type=int)
 
-    classes = Course.query.options(
-        db.joinedload(Course.teacher),
-        db.joinedload(Course.enrollments).joinedload(Enrollment.student)
-    ).all()
+    try:
+        classes, next_cursor = load_catalog_page(sort, order, after, limit)
+    except ValueError:
+        return redirect(url_for("main.admin_dashboard"))
 
-    return render_template("admin_dashboard.html", classes=classes)
+    return render_template(
+        "admin_dashboard.html",
+        classes=classes,
+        sort=sort,
+        order=order,
+        limit=limit,
+        next_cursor=next_cursor,
+        first_page=after is None
+    )
 
-@app.route("/admin/add", methods=["GET", "POST"])
+@main.route("/admin/add", methods=["GET", "POST"])
 def admin_add_class():
     # Only admins can access this
     if "user_id" not in session or session.get("role") != "admin":
-        return redirect(url_for("admin_login"))
+        return redirect(url_for("main.admin_login"))
 
     if request.method == "POST":
         name = request.form.get("name")
@@ -270,51 +453,74 @@ def admin_add_class():
         )
         db.session.add(new_course)
         db.session.commit()
+        invalidate_catalog()
 
         print(f"Admin added new class: {name}")
-        return redirect(url_for("admin_dashboard"))
+        return redirect(url_for("main.admin_dashboard"))
 
     # GET: show the form with list of teachers
     teachers = Teacher.query.all()
     return render_template("admin_add_class.html", teachers=teachers)
 
-@app.route('/student/register')
+@main.route('/student/register')
 def student_register():
     # Check if user is logged in as student
     if 'user_id' not in session or session.get('role') != 'student':
-        return redirect(url_for('student_login'))
+        return redirect(url_for('main.student_login'))
     
     student_id = session['user_id']
     student_name = session['user_name']
     
     print(f"Loading registration page for student: {student_name} (ID: {student_id})")
-    
-    # Get all available courses
-    courses = Course.query.all()
-    course_data = []
-    
-    for course in courses:
-        enrollment_count = Enrollment.query.filter_by(course_id=course.id).count()
-        course_data.append({
-            'id': course.id,
-            'name': course.name,
-            'professor': course.teacher.name,
-            'enrolled': enrollment_count,
-            'capacity': course.capacity
-        })
-    
-    print(f"Passing {len(course_data)} courses to registration page")
-    
-    # Debug: print each course
-    for course in course_data:
-        print(f"   - {course['name']} by {course['professor']} ({course['enrolled']}/{course['capacity']})")
-    
-    return render_template('student_register.html', courses=course_data)
+
+    # The course list is fetched page by page by student.js (/api/courses/search)
+    return render_template('student_register.html')
 
 # API ENDPOINTS
 
+# Course search for the registration page: ?q= searches names, descriptions
+# and teachers (best match first), an empty q pages through the catalog by
+# name. Pass the previous page's 'next' as ?after= for the following page
+@main.route('/api/courses/search')
+def api_course_search():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    text = request.args.get('q', '').strip()
+    after = request.args.get('after')
+    limit = request.args.get('limit', 20, type=int)
+
+    try:
+        if text:
+            courses, next_cursor = search_catalog(text, after, limit)
+        else:
+            courses, next_cursor = load_catalog_page('name', 'asc', after, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Which of these the student has already joined (one query)
+    joined = set()
+    if session.get('role') == 'student' and courses:
+        joined = {course_id for (course_id,) in db.session.query(Enrollment.course_id).filter(
+            Enrollment.student_id == session['user_id'],
+            Enrollment.course_id.in_([c['id'] for c in courses])
+        )}
+
+    return jsonify({
+        'courses': [{
+            'id': c['id'],
+            'name': c['name'],
+            'description': c['description'],
+            'professor': c['professor'],
+            'enrolled': c['enrolled'],
+            'capacity': c['capacity'],
+            'joined': c['id'] in joined,
+        } for c in courses],
+        'next': next_cursor,
+    })
+
 # allows the front end javascript to update grades in the teacher.js function
-@app.route('/api/course/<int:course_id>/student/<int:student_id>/grade', methods=['PUT'])
+@main.route('/api/course/<int:course_id>/student/<int:student_id>/grade', methods=['PUT'])
 def update_grade(course_id, student_id):
     if 'user_id' not in session or session.get('role') != 'teacher':
         return jsonify({'error': 'Not logged in'}), 401
@@ -325,18 +531,57 @@ def update_grade(course_id, student_id):
         return jsonify({'error': 'Unauthorized'}), 403
 
     data = request.json
-    grade = data.get('grade')
 
-    enrollment = Enrollment.query.filter_by(course_id=course_id, student_id=student_id).first()
-    if not enrollment:
+    try:
+        grade = parse_grade(data.get('grade'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid grade'}), 400
+
+    try:
+        version = parse_version(data.get('version'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid version'}), 400
+
+    try:
+        version = write_queue.run(set_grade, course_id, student_id, grade, version)
+    except GradeConflict as e:
+        return _grade_conflict(e)
+
+    if version is None:
         return jsonify({'error': 'Enrollment not found'}), 404
 
-    enrollment.grade = grade
-    db.session.commit()
+    return jsonify({'message': 'Grade updated successfully', 'version': version})
+
+# bulk version of update_grade - the whole gradebook for a course in one request
+@main.route('/api/course/<int:course_id>/grades', methods=['PUT'])
+def update_grades_bulk(course_id):
+    if 'user_id' not in session or session.get('role') != 'teacher':
+        return jsonify({'error': 'Not logged in'}), 401
+
+    course = Course.query.get_or_404(course_id)
+
+    if course.teacher_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        rows = read_grade_rows(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    return jsonify({'message': 'Grade updated successfully'})
+    versions, errors = write_queue.run(save_grades, course_id, rows)
+    updated = len(versions)
 
-@app.route('/api/student/register', methods=['POST'])
+    print(f"Bulk grade upload for course {course_id}: {updated} updated, {len(errors)} errors")
+
+    # Rows that lost a race are in errors with the current grade and version
+    return jsonify({
+        'message': f'{updated} grades updated',
+        'updated': updated,
+        'versions': versions,
+        'errors': errors
+    })
+
+@main.route('/api/student/register', methods=['POST'])
 def api_student_register():
     if 'user_id' not in session or session.get('role') != 'student':
         return jsonify({'error': 'Not logged in'}), 401
@@ -346,6 +591,13 @@ def api_student_register():
     course_id = request.json.get('courseId')
     
     print(f"Student {student_name} (ID: {student_id}) attempting to enroll in course {course_id}")
+
+    if registration_queue.enabled:
+        try:
+            course_id = int(course_id)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Course not found'}), 404
+        return _queue_registration(student_id, [course_id], single=True)
     
     # Check if course exists
     course = Course.query.get(course_id)
@@ -362,23 +614,215 @@ def api_student_register():
         print(f"Student already enrolled in {course.name}")
         return jsonify({'error': 'Already enrolled in this course'}), 400
     
-    # Check course capacity
-    enrollment_count = Enrollment.query.filter_by(course_id=course_id).count()
-    if enrollment_count >= course.capacity:
-        print(f"Course {course.name} is full ({enrollment_count}/{course.capacity})")
+    course_name = course.name
+
+    # Claim a seat and create the enrollment atomically
+    status = write_queue.run(admit_student, student_id, course_id)
+    if status == 'full':
+        print(f"Course {course_name} is full")
         return jsonify({'error': 'Course is full'}), 400
+    if status == 'duplicate':
+        print(f"Student already enrolled in {course_name}")
+        return jsonify({'error': 'Already enrolled in this course'}), 400
     
-    # Create new enrollment
-    new_enrollment = Enrollment(student_id=student_id, course_id=course_id)
-    db.session.add(new_enrollment)
-    db.session.commit()
-    
-    print(f"Successfully enrolled {student_name} in {course.name}")
+    print(f"Successfully enrolled {student_name} in {course_name}")
     
     return jsonify({'message': 'Successfully enrolled in course'})
 
+MAX_CART_SIZE = 20
+
+# Register for several courses at once (the registration page's cart)
+@main.route('/api/student/register/batch', methods=['POST'])
+def api_student_register_batch():
+    if 'user_id' not in session or session.get('role') != 'student':
+        return jsonify({'error': 'Not logged in'}), 401
+
+    student_id = session['user_id']
+    course_ids = (request.json or {}).get('courseIds')
+
+    if not isinstance(course_ids, list) or not course_ids:
+        return jsonify({'error': 'courseIds must be a non-empty list'}), 400
+    if len(course_ids) > MAX_CART_SIZE:
+        return jsonify({'error': f'At most {MAX_CART_SIZE} courses at a time'}), 400
+    try:
+        course_ids = [int(course_id) for course_id in course_ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'courseIds must be course ids'}), 400
+
+    print(f"Student {session['user_name']} (ID: {student_id}) registering for courses {course_ids}")
+
+    if registration_queue.enabled:
+        return _queue_registration(student_id, list(dict.fromkeys(course_ids)))
+
+    results = write_queue.run(admit_student_batch, student_id, course_ids)
+    enrolled = sum(1 for status in results.values() if status == 'enrolled')
+
+    print(f"Enrolled in {enrolled} of {len(results)} courses")
+
+    return jsonify({
+        'enrolled': enrolled,
+        'results': [{'courseId': course_id, 'status': status} for course_id, status in results.items()]
+    })
+
+# REGISTRATION SURGE MODE (see surge.py)
+# The register endpoints check only what the catalog cache can answer without
+# a query, queue the rest and answer 202 with a ticket. The browser polls the
+# ticket's status URL for the outcome
+
+def _queue_registration(student_id, course_ids, single=False):
+    results = dict.fromkeys(course_ids, 'queued')
+    queued = []
+    for course_id in course_ids:
+        entry = load_catalog_entry(course_id)
+        if entry is None:
+            results[course_id] = 'not_found'
+        elif entry['enrolled'] >= entry['capacity']:
+            # Seat counts in the cache can lag other workers by the cache TTL,
+            # so this only turns away courses that looked full recently
+            results[course_id] = 'full'
+        else:
+            queued.append(course_id)
+
+    if single and not queued:
+        if results[course_ids[0]] == 'full':
+            return jsonify({'error': 'Course is full'}), 400
+        return jsonify({'error': 'Course not found'}), 404
+
+    if not queued:
+        return jsonify({
+            'enrolled': 0,
+            'results': [{'courseId': course_id, 'status': status} for course_id, status in results.items()]
+        })
+
+    try:
+        ticket = registration_queue.submit(student_id, queued)
+    except SurgeQueueFull:
+        response = jsonify({'error': 'Registration is very busy right now, please try again in a moment'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+
+    status_url = url_for('main.api_registration_status', ticket=ticket)
+    response = jsonify({
+        'ticket': ticket,
+        'statusUrl': status_url,
+        'results': [{'courseId': course_id, 'status': status} for course_id, status in results.items()]
+    })
+    response.headers['Location'] = status_url
+    return response, 202
+
+@main.route('/api/student/register/status/<ticket>')
+def api_registration_status(ticket):
+    if 'user_id' not in session or session.get('role') != 'student':
+        return jsonify({'error': 'Not logged in'}), 401
+
+    status = registration_queue.status(ticket, session['user_id'])
+    if status is None:
+        return jsonify({'error': 'Unknown or expired ticket'}), 404
+
+    results = status['results']
+    return jsonify({
+        'ticket': ticket,
+        'done': status['done'],
+        'enrolled': sum(1 for s in results.values() if s == 'enrolled'),
+        'results': [{'courseId': course_id, 'status': s} for course_id, s in results.items()]
+    })
+
+# TRANSCRIPTS (current and archived terms)
+
+@main.route('/api/student/transcript')
+def api_student_transcript():
+    if 'user_id' not in session or session.get('role') != 'student':
+        return jsonify({'error': 'Not logged in'}), 401
+
+    return jsonify(transcript(session['user_id']))
+
+@main.route('/api/admin/students/<int:student_id>/transcript')
+def api_admin_student_transcript(student_id):
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Not authorized"}), 401
+
+    student = Student.query.get_or_404(student_id)
+    return jsonify({"student": student.name, "courses": transcript(student_id)})
+
+# GRADEBOOK EXPORT (streams CSV or NDJSON, ?format=csv|ndjson)
+
+def _export_response(course_id, filename):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unknown format '{fmt}'"}), 400
+
+    stream, mimetype = EXPORT_FORMATS[fmt]
+    rows = export_query(course_id)
+    return Response(
+        stream_with_context(stream(rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'}
+    )
+
+@main.route('/api/grades/export')
+def api_grades_export():
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Not authorized"}), 401
+
+    print("Admin exporting all grades")
+    return _export_response(None, 'grades')
+
+@main.route('/api/course/<int:course_id>/grades/export')
+def api_course_grades_export(course_id):
+    role = session.get('role')
+    if 'user_id' not in session or role not in ('teacher', 'admin'):
+        return jsonify({'error': 'Not logged in'}), 401
+
+    course = Course.query.get_or_404(course_id)
+    if role == 'teacher' and course.teacher_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    print(f"Exporting grades for course {course_id}")
+    return _export_response(course_id, f'course_{course_id}_grades')
+
+# Live seat counts for the registration page (Server-Sent Events)
+@main.route('/api/seats/stream')
+def seat_stream():
+    if 'user_id' not in session or session.get('role') != 'student':
+        return jsonify({'error': 'Not logged in'}), 401
+
+    # The page falls back to polling /api/seats when it is turned away
+    if not seat_events.connect():
+        return jsonify({'error': 'Too many open seat streams, poll /api/seats instead'}), 503
+
+    # Not wrapped in stream_with_context: the request (and its DB session)
+    # is finished before the stream starts
+    response = Response(
+        seat_events.stream(request.headers.get('Last-Event-ID', type=int)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The server closes the response even when the body is never read (HEAD,
+    # a client gone before the first event), so the slot is always given back
+    response.call_on_close(seat_events.disconnect)
+    return response
+
+MAX_SEAT_POLL = 200
+
+# Seat counts for the given courses (?ids=1,2,3), for registration pages that
+# couldn't get a seat stream
+@main.route('/api/seats')
+def seat_counts():
+    if 'user_id' not in session or session.get('role') != 'student':
+        return jsonify({'error': 'Not logged in'}), 401
+
+    try:
+        course_ids = [int(course_id) for course_id in request.args.get('ids', '').split(',') if course_id]
+    except ValueError:
+        return jsonify({'error': 'ids must be course ids'}), 400
+    if len(course_ids) > MAX_SEAT_POLL:
+        return jsonify({'error': f'At most {MAX_SEAT_POLL} courses at a time'}), 400
+
+    rows = db.session.query(Course.id, Course.enrolled_count).filter(Course.id.in_(course_ids))
+    return jsonify({'seats': {course_id: enrolled for course_id, enrolled in rows}})
+
 # Grades API endpoints for your index.html and script.js
-@app.route('/api/grades', methods=['GET', 'POST'])
+@main.route('/api/grades', methods=['GET', 'POST'])
 def api_grades():
     if request.method == 'GET':
         # Return all grades
@@ -395,7 +839,16 @@ def api_grades():
         # Add new grade
         data = request.json
         student_name = data.get('name')
-        grade = data.get('grade')
+
+        try:
+            grade = parse_grade(data.get('grade'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid grade'}), 400
+
+        try:
+            version = parse_version(data.get('version'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid version'}), 400
         
         print(f"Adding grade {grade} for student {student_name}")
         
@@ -404,22 +857,35 @@ def api_grades():
         if student:
             # For demo, add to first enrollment or create one
             enrollment = Enrollment.query.filter_by(student_id=student.id).first()
-            if not enrollment:
-                # Create a dummy enrollment if none exists
+            if enrollment is None:
+                # Enroll in the first course, through the same seat check as registration
                 first_course = Course.query.first()
-                enrollment = Enrollment(student_id=student.id, course_id=first_course.id)
-                db.session.add(enrollment)
-            
-            enrollment.grade = grade
-            db.session.commit()
+                if first_course is None:
+                    return jsonify({'error': 'No course to enroll the student in'}), 404
+                course_id = first_course.id
+                status = write_queue.run(admit_student, student.id, course_id)
+                if status == 'full':
+                    print(f"Course {first_course.name} is full")
+                    return jsonify({'error': 'Course is full'}), 400
+                # 'duplicate' means a concurrent request enrolled them first - just grade it
+                version = None
+            else:
+                course_id = enrollment.course_id
+
+            try:
+                version = write_queue.run(set_grade, course_id, student.id, grade, version)
+            except GradeConflict as e:
+                return _grade_conflict(e)
+            if version is None:
+                return jsonify({'error': 'Enrollment not found'}), 404
             print(f"Added grade {grade} for {student_name}")
-            return jsonify({'message': 'Grade added successfully'})
+            return jsonify({'message': 'Grade added successfully', 'version': version})
         
         print(f"Student {student_name} not found")
         return jsonify({'error': 'Student not found'}), 404
 
 # Individual student grade options
-@app.route('/api/grades/<student_name>', methods=['GET', 'PUT', 'DELETE'])
+@main.route('/api/grades/<student_name>', methods=['GET', 'PUT', 'DELETE'])
 def api_grade_student(student_name):
     print(f"Grade operation for student: {student_name}")
     
@@ -432,20 +898,34 @@ def api_grade_student(student_name):
         enrollment = Enrollment.query.filter_by(student_id=student.id).first()
         if enrollment and enrollment.grade:
             print(f"Found grade {enrollment.grade} for {student_name}")
-            return jsonify({student_name: enrollment.grade})
+            # Send the version back with a PUT/DELETE to detect concurrent edits
+            return jsonify({student_name: enrollment.grade, 'version': enrollment.version})
         print(f"No grade found for {student_name}")
         return jsonify({'error': 'Grade not found'}), 404
     
-    elif request.method == 'PUT':
+    # PUT and DELETE take an optional "version" in the JSON body
+    try:
+        version = parse_version((request.get_json(silent=True) or {}).get('version'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid version'}), 400
+
+    if request.method == 'PUT':
         data = request.json
-        new_grade = data.get('grade')
+        try:
+            new_grade = parse_grade(data.get('grade'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid grade'}), 400
         
         enrollment = Enrollment.query.filter_by(student_id=student.id).first()
         if enrollment:
-            enrollment.grade = new_grade
-            db.session.commit()
+            try:
+                _, version = write_queue.run(set_enrollment_grade, enrollment.id, new_grade, version)
+            except LookupError:
+                return jsonify({'error': 'Enrollment not found'}), 404
+            except GradeConflict as e:
+                return _grade_conflict(e)
             print(f"Updated grade to {new_grade} for {student_name}")
-            return jsonify({'message': 'Grade updated successfully'})
+            return jsonify({'message': 'Grade updated successfully', 'version': version})
         
         print(f"No enrollment found for {student_name}")
         return jsonify({'error': 'Enrollment not found'}), 404
@@ -453,10 +933,14 @@ def api_grade_student(student_name):
     elif request.method == 'DELETE':
         enrollment = Enrollment.query.filter_by(student_id=student.id).first()
         if enrollment:
-            enrollment.grade = None
-            db.session.commit()
+            try:
+                _, version = write_queue.run(set_enrollment_grade, enrollment.id, None, version)
+            except LookupError:
+                return jsonify({'error': 'Enrollment not found'}), 404
+            except GradeConflict as e:
+                return _grade_conflict(e)
             print(f"Deleted grade for {student_name}")
-            return jsonify({'message': 'Grade deleted successfully'})
+            return jsonify({'message': 'Grade deleted successfully', 'version': version})
         
         print(f"No enrollment found for {student_name}")
         return jsonify({'error': 'Enrollment not found'}), 404
@@ -464,26 +948,47 @@ def api_grade_student(student_name):
 # ADMIN COURSE MANAGEMENT API (used by admin.js Edit/Delete/Add)
 
 
-def _course_to_dict(course: Course):
-    enrollment_count = Enrollment.query.filter_by(course_id=course.id).count()
+def _course_to_dict(entry):
+    # entry is a catalog dict from load_catalog()
     return {
-        "id": course.id,
-        "name": course.name,
-        "professor": course.teacher.name if course.teacher else "No Teacher",
-        "students": enrollment_count,
-        "capacity": course.capacity,
+        "id": entry["id"],
+        "name": entry["name"],
+        "professor": entry["professor"],
+        "students": entry["enrolled"],
+        "capacity": entry["capacity"],
+        "term": entry["term"],
     }
 
 
-@app.route("/api/admin/courses", methods=["GET", "POST"])
+@main.route("/api/admin/courses", methods=["GET", "POST"])
 def api_admin_courses():
     # Ensure admin
     if "user_id" not in session or session.get("role") != "admin":
         return jsonify({"error": "Not authorized"}), 401
 
     if request.method == "GET":
-        courses = Course.query.all()
-        return jsonify([_course_to_dict(c) for c in courses])
+        stamps = read_stamps("courses", "seats")
+        etag = page_etag("courses", "seats", extra=request.query_string.decode(), stamps=stamps)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        sync_catalog(stamps)
+
+        # Keyset pagination: pass the X-Next-Cursor header back as ?after=
+        try:
+            courses, next_cursor = load_catalog_page(
+                request.args.get("sort", "id"),
+                request.args.get("order", "asc"),
+                request.args.get("after"),
+                request.args.get("limit", 50, type=int),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        response = jsonify([_course_to_dict(c) for c in courses])
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return with_etag(response, etag)
 
     # POST - create new course
     data = request.json or {}
@@ -503,14 +1008,16 @@ def api_admin_courses():
         description=data.get("description", ""),
         capacity=capacity,
         teacher_id=teacher.id,
+        term=data.get("term") or current_term(),
     )
     db.session.add(course)
     db.session.commit()
+    invalidate_catalog()
 
     print(f"Admin created course {course.name} (ID: {course.id})")
-    return jsonify(_course_to_dict(course)), 201
+    return jsonify(_course_to_dict(load_catalog_entry(course.id))), 201
 
-@app.route("/admin/course/<int:course_id>/edit")
+@main.route("/admin/course/<int:course_id>/edit")
 def admin_edit_course(course_id):
     # Get the course
     course = Course.query.get_or_404(course_id)
@@ -522,7 +1029,7 @@ def admin_edit_course(course_id):
     return render_template("admin_edit.html", course=course)
 
 # Admin Edit/Delete course
-@app.route("/api/admin/courses/<int:course_id>", methods=["PUT", "DELETE"])
+@main.route("/api/admin/courses/<int:course_id>", methods=["PUT", "DELETE"])
 def api_admin_course_detail(course_id):
     
     if "user_id" not in session or session.get("role") != "admin":
@@ -550,33 +1057,135 @@ def api_admin_course_detail(course_id):
             course.teacher_id = teacher.id
 
         db.session.commit()
+        invalidate_catalog()
         print(f"Admin updated course {course.id}")
-        return jsonify(_course_to_dict(course))
+        return jsonify(_course_to_dict(load_catalog_entry(course.id)))
 
     # DELETE
     Enrollment.query.filter_by(course_id=course.id).delete()
     db.session.delete(course)
     db.session.commit()
+    invalidate_catalog()
     print(f"Admin deleted course {course_id}")
     return jsonify({"message": "Course deleted"})
 
 
+# Grade statistics for every course
+@main.route("/api/admin/grade-stats")
+def api_admin_grade_stats():
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Not authorized"}), 401
+
+    stats = all_grade_stats()
+    return jsonify([
+        dict(stats.get(c["id"], NO_GRADES), course_id=c["id"], name=c["name"])
+        for c in load_catalog()
+    ])
+
+# Bulk roster import: POST the CSV as the request body (it is read as it
+# arrives) and get NDJSON progress back, one line per chunk plus a summary
+@main.route("/api/admin/roster/<kind>", methods=["POST"])
+def api_admin_roster_import(kind):
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Not authorized"}), 401
+    if kind not in ROSTER_KINDS:
+        return jsonify({"error": f"Unknown roster kind '{kind}'"}), 400
+
+    lines = codecs.iterdecode(request.stream, "utf-8-sig")
+
+    def progress():
+        summary = {"processed": 0, "inserted": 0, "failed": 0}
+        for chunk in import_roster(kind, lines):
+            summary["failed"] += len(chunk["errors"])
+            summary.update(processed=chunk["processed"], inserted=chunk["inserted"])
+            print(f"Roster import ({kind}): {chunk['processed']} rows read, {chunk['inserted']} imported")
+            yield json.dumps(chunk) + "\n"
+        yield json.dumps(dict(summary, done=True)) + "\n"
+
+    return Response(stream_with_context(progress()), mimetype="application/x-ndjson")
+
+# Catalog cache hit/miss counters
+@main.route("/api/admin/cache-stats")
+def api_admin_cache_stats():
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Not authorized"}), 401
+
+    return jsonify(catalog_cache.stats())
+
+
 # ADMIN WORK
-@app.route('/admin_logout')
+@main.route('/admin_logout')
 def admin_logout():
     session.pop('role', None)
     session.pop('user_id', None)
-    return redirect(url_for('admin_login'))
+    return redirect(url_for('main.admin_login'))
 
 
 # Logout
 
-@app.route('/logout')
+@main.route('/logout')
 def logout():
     user_info = f"{session.get('user_name', 'Unknown')} ({session.get('role', 'Unknown')})"
     session.clear()
     print(f"User logged out: {user_info}")
-    return redirect(url_for('student_login'))
+    return redirect(url_for('main.student_login'))
+
+# CLI COMMANDS
+
+@main.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any hot query falls back to a full table scan or a sort"""
+    failed = 0
+    for label, plan, ok in check_query_plans():
+        print(f"{'ok  ' if ok else 'FAIL'} {label}")
+        for detail in plan:
+            print(f"       {detail}")
+        if not ok:
+            failed += 1
+
+    if failed:
+        raise SystemExit(f"{failed} queries use a full table scan or a temporary b-tree")
+
+@main.cli.command('build-assets')
+def build_assets_command():
+    """Write fingerprinted, pre-compressed copies of the CSS/JS to static/dist"""
+    manifest = build_assets(current_app.static_folder)
+    for name, hashed in sorted(manifest.items()):
+        print(f"{name} -> {hashed}")
+
+@main.cli.command('rebuild-grade-stats')
+def rebuild_grade_stats_command():
+    """Recompute every course's grade statistics from the enrollments table"""
+    rebuild_grade_stats()
+    print("Grade statistics rebuilt")
+
+@main.cli.command('import-roster')
+@click.argument('kind', type=click.Choice(ROSTER_KINDS))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, help='Rows per insert')
+@click.option('--processes', type=int, default=None, help='Hashing processes (default: CPU count, 0 hashes inline)')
+def import_roster_command(kind, path, chunk_size, processes):
+    """Bulk-import students, teachers or courses from a CSV file"""
+    failed = 0
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for chunk in import_roster(kind, f, chunk_size, processes):
+            for error in chunk['errors']:
+                print(f"  line {error['line']}: {error['error']}")
+            failed += len(chunk['errors'])
+            print(f"{chunk['processed']} rows read, {chunk['inserted']} imported, {failed} rejected")
+
+@main.cli.command('rollover-term')
+@click.argument('term')
+@click.option('--batch-size', default=ROLLOVER_BATCH_SIZE, show_default=True, help='Enrollments moved per transaction')
+def rollover_term_command(term, batch_size):
+    """Archive a closed term's enrollments out of the live enrollments table"""
+    archived = 0
+    try:
+        for archived in rollover_term(term, batch_size):
+            print(f"{archived} enrollments archived")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"Term '{term}' rolled over: {archived} enrollments archived")
 
 # APPLICATION STARTUP
 
@@ -588,4 +1197,4 @@ if __name__ == '__main__':
     print("   Admin: admin / admin123")
     print("")
     
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
\ No newline at end of file
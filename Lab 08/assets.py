@@ -0,0 +1,165 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from flask import abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional - without it only gzip variants are built
+    brotli = None
+
+# STATIC ASSET PIPELINE
+# The app's own CSS and JS are copied to static/dist under content-hashed
+# names (js/student.3f2a9c1b.js) next to pre-compressed .br and .gz copies,
+# and a manifest maps each source path to its hashed name. Templates link
+# them with asset_url('js/student.js'). A hashed file never changes, so
+# /assets/ serves it with an immutable one-year Cache-Control and repeat page
+# views don't request it at all; editing a file gives it a new name.
+#
+# 'flask build-assets' builds static/dist, as a deploy step: the app itself
+# never writes into the source tree unless ASSETS_AUTO_BUILD is set (handy in
+# development, where it rebuilds whenever a source file is newer than the
+# manifest). Until static/dist is built, pages link the plain /static/ files.
+#
+# Settings (app.config):
+#   ASSETS_FINGERPRINT  link fingerprinted files (False: plain /static/ URLs)
+#   ASSETS_AUTO_BUILD   rebuild a stale static/dist at startup (default off)
+
+ASSET_SOURCES = ('css', 'js')  # directories under static/ that are built
+ASSET_MAX_AGE = 365 * 24 * 3600
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Most preferred first: (Accept-Encoding token, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = {}
+_served = {}  # hashed name -> suffixes of the compressed copies built for it
+
+
+def _source_files(static_folder):
+    for directory in ASSET_SOURCES:
+        root = os.path.join(static_folder, directory)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def _write(path, data):
+    # Write then rename, so a worker never serves a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+def build_assets(static_folder):
+    """Write fingerprinted and compressed copies of every asset to static/dist.
+
+    Returns the manifest ({source path: hashed path}).
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+
+    for name, path in _source_files(static_folder):
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+        manifest[name] = hashed
+
+        target = os.path.join(dist, hashed)
+        if os.path.exists(target):
+            continue
+        _write(target, data)
+        _write(target + '.gz', gzip.compress(data, GZIP_LEVEL, mtime=0))
+        if brotli is not None:
+            _write(target + '.br', brotli.compress(data, quality=BROTLI_QUALITY))
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _stale(static_folder):
+    manifest = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    if not os.path.exists(manifest):
+        return True
+    built = os.path.getmtime(manifest)
+    return any(os.path.getmtime(path) > built for _, path in _source_files(static_folder))
+
+
+def load_manifest(static_folder=None):
+    """Read static/dist/manifest.json into memory (empty if it isn't built,
+    or when static_folder is None)"""
+    global _manifest, _served
+    manifest = {}
+    if static_folder is not None:
+        dist = os.path.join(static_folder, DIST_DIR)
+        try:
+            with open(os.path.join(dist, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    _manifest = manifest
+    _served = {
+        hashed: [suffix for _, suffix in ENCODINGS if os.path.exists(os.path.join(dist, hashed + suffix))]
+        for hashed in manifest.values()
+    }
+
+
+def asset_url(path):
+    """URL for a static asset, fingerprinted when it has been built"""
+    hashed = _manifest.get(path)
+    if hashed is None:
+        return url_for('static', filename=path)
+    return url_for('assets', filename=hashed)
+
+
+def _serve_asset(filename, dist):
+    suffixes = _served.get(filename)
+    if suffixes is None:
+        abort(404)
+
+    suffix, encoding = '', None
+    for token, candidate in ENCODINGS:
+        if candidate in suffixes and request.accept_encodings[token]:
+            suffix, encoding = candidate, token
+            break
+
+    response = send_from_directory(
+        dist, filename + suffix,
+        mimetype=mimetypes.guess_type(filename)[0],
+        max_age=ASSET_MAX_AGE,
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def setup_assets(app):
+    app.config.setdefault('ASSETS_FINGERPRINT', True)
+    app.config.setdefault('ASSETS_AUTO_BUILD', False)
+    dist = os.path.join(app.static_folder, DIST_DIR)
+
+    if app.config['ASSETS_FINGERPRINT']:
+        if _stale(app.static_folder):
+            if app.config['ASSETS_AUTO_BUILD']:
+                print("Building static assets")
+                build_assets(app.static_folder)
+            elif os.path.exists(os.path.join(dist, MANIFEST)):
+                print("Static assets are older than their sources - run 'flask build-assets'")
+        load_manifest(app.static_folder)
+    else:
+        load_manifest()
+
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.add_url_rule('/assets/<path:filename>', 'assets', lambda filename: _serve_asset(filename, dist))
@@ -0,0 +1,27 @@
+import threading
+
+# BACKGROUND WORKERS
+# Queues that hand work to a thread of their own (the SQLite write queue,
+# the registration surge queue) subclass BackgroundWorker. The thread is
+# started on first use rather than at import, so the app can be imported
+# before gunicorn forks (threads don't survive a fork), and is started again
+# if it has died.
+
+
+class BackgroundWorker:
+    """Runs self._work() on one daemon thread named thread_name, started lazily"""
+
+    thread_name = 'background-worker'
+
+    def __init__(self):
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name=self.thread_name, daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        raise NotImplementedError
@@ -0,0 +1,123 @@
+"""Fill a fresh database with synthetic students, teachers, courses and enrollments.
+
+    python -m benchmarks.loadgen --db /tmp/big.db --students 20000 --courses 2000 --enrollments 100000
+
+Every generated account uses the password 'password' (admin: admin / admin123).
+"""
+import argparse
+import os
+import random
+import time
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie',
+               'Avery', 'Quinn', 'Drew', 'Parker', 'Reese', 'Rowan', 'Skyler', 'Dakota']
+LAST_NAMES = ['Garcia', 'Smith', 'Nguyen', 'Patel', 'Kim', 'Lopez', 'Brown', 'Chen',
+              'Santos', 'Miller', 'Davis', 'Wilson', 'Moore', 'Clark', 'Lewis', 'Young']
+SUBJECTS = ['Intro to', 'Advanced', 'Topics in', 'Foundations of', 'Seminar on']
+FIELDS = ['Web Development', 'Data Structures', 'Calculus', 'World History', 'Biology',
+          'Databases', 'Statistics', 'Philosophy', 'Chemistry', 'Economics']
+
+CHUNK_SIZE = 5000
+
+
+def _name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _insert(model, rows):
+    from sqlalchemy import insert
+    from models import db
+
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def generate(students=1000, teachers=50, courses=200, enrollments=5000, seed=0):
+    """Generate data into the current app's (empty) database. Needs an app context"""
+    from models import db, Student, Teacher, Admin, Course, Enrollment
+    from passwords import hash_password
+
+    rng = random.Random(seed)
+    # Hashing is slow, so every account shares one hash of 'password'
+    password_hash = hash_password('password')
+
+    admin = Admin(username='admin')
+    admin.set_password('admin123')
+    db.session.add(admin)
+
+    _insert(Teacher, [
+        {'id': i, 'name': _name(rng), 'email': f'teacher{i}@example.edu', 'password_hash': password_hash}
+        for i in range(1, teachers + 1)
+    ])
+    _insert(Student, [
+        {'id': i, 'name': _name(rng), 'email': f'student{i}@example.edu', 'password_hash': password_hash}
+        for i in range(1, students + 1)
+    ])
+
+    capacities = [rng.randint(20, 300) for _ in range(courses)]
+    enrolled = [0] * courses
+    pairs = set()
+    attempts = 0
+    while len(pairs) < enrollments and attempts < enrollments * 3:
+        attempts += 1
+        course = rng.randrange(courses)
+        pair = (rng.randint(1, students), course + 1)
+        if enrolled[course] < capacities[course] and pair not in pairs:
+            pairs.add(pair)
+            enrolled[course] += 1
+
+    _insert(Course, [
+        {
+            'id': i + 1,
+            'name': f'{rng.choice(SUBJECTS)} {rng.choice(FIELDS)} {100 + i}',
+            'description': rng.choice(FIELDS),
+            'capacity': capacities[i],
+            'enrolled_count': enrolled[i],
+            'teacher_id': rng.randint(1, teachers),
+        }
+        for i in range(courses)
+    ])
+    _insert(Enrollment, [
+        {
+            'student_id': student_id,
+            'course_id': course_id,
+            'grade': round(rng.uniform(50, 100), 1) if rng.random() < 0.7 else None,
+        }
+        for student_id, course_id in sorted(pairs)
+    ])
+
+    db.session.commit()
+    return len(pairs)
+
+
+def add_arguments(parser):
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--teachers', type=int, default=50)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--enrollments', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', required=True, help='path of the new SQLite file')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        raise SystemExit(f'{args.db} already exists - pick a new file')
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+
+    from app import create_app
+
+    app = create_app()
+
+    start = time.perf_counter()
+    with app.app_context():
+        count = generate(args.students, args.teachers, args.courses, args.enrollments, args.seed)
+    print(f'Generated {args.students} students, {args.teachers} teachers, {args.courses} courses '
+          f'and {count} enrollments in {time.perf_counter() - start:.1f}s -> {args.db}')
+
+
+if __name__ == '__main__':
+    main()
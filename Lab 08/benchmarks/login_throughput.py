@@ -0,0 +1,107 @@
+"""Login throughput: inline password checks vs. the bounded password pool.
+
+Runs a burst of student logins from many threads while another thread keeps
+loading a dashboard, and reports login throughput, 503 rejections and the
+dashboard latency seen during the burst. Uses a throwaway database.
+
+    python -m benchmarks.login_throughput --threads 32 --logins 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+db_file = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+
+from app import create_app  # noqa: E402
+from models import db, Student, Teacher, Course  # noqa: E402
+from passwords import configure_passwords  # noqa: E402
+
+app = create_app()
+
+
+def seed():
+    with app.app_context():
+        teacher = Teacher(name='Bench Teacher', email='teacher@bench')
+        teacher.set_password('password')
+        student = Student(name='Bench Student', email='student@bench')
+        student.set_password('password')
+        db.session.add_all([teacher, student])
+        db.session.flush()
+        db.session.add(Course(name='Bench 101', capacity=30, teacher_id=teacher.id))
+        db.session.commit()
+        return student.id
+
+
+def run(mode, threads, logins, student_id):
+    app.config['PASSWORD_WORKERS'] = 0 if mode == 'inline' else app.config['BENCH_WORKERS']
+    configure_passwords(app)
+
+    codes = []
+    dashboard_times = []
+    done = threading.Event()
+
+    def login_worker():
+        client = app.test_client()
+        for _ in range(logins):
+            response = client.post('/student/login', data={
+                'studentLoginEmail': 'student@bench',
+                'studentLoginPassword': 'password',
+            })
+            codes.append(response.status_code)
+
+    def dashboard_worker():
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s['user_id'] = student_id
+            s['user_name'] = 'Bench Student'
+            s['role'] = 'student'
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/student/dashboard')
+            dashboard_times.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=login_worker) for _ in range(threads)]
+    watcher = threading.Thread(target=dashboard_worker)
+
+    # app.py logs every request with print(); keep that out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        watcher.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        watcher.join()
+
+    ok = codes.count(302)
+    quantiles = statistics.quantiles(dashboard_times, n=20) if len(dashboard_times) > 1 else [0] * 19
+    print(f"{mode:7} logins ok={ok:5} busy(503)={codes.count(503):5} "
+          f"{ok / elapsed:8.1f} logins/s   dashboard p50={quantiles[9] * 1000:7.1f}ms "
+          f"p95={quantiles[18] * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=8, help='logins per thread')
+    parser.add_argument('--workers', type=int, default=app.config['PASSWORD_WORKERS'])
+    args = parser.parse_args()
+
+    app.config['BENCH_WORKERS'] = args.workers
+    student_id = seed()
+    print(f"hash method: {app.config['PASSWORD_HASH_METHOD']}, pool workers: {args.workers}, "
+          f"queue limit: {app.config['PASSWORD_QUEUE_LIMIT']}")
+    for mode in ('inline', 'pool'):
+        run(mode, args.threads, args.logins, student_id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Enrollments per second during a registration rush, with and without surge mode.
+
+Each mode runs in its own process against a fresh generated database. Client
+threads post registrations for random students and courses as fast as they
+can for --seconds; in surge mode the run then waits for the queue to drain.
+Reports enrollments committed per second (over the whole run, drain
+included), request latency and turned-away (503) requests.
+
+    python -m benchmarks.registration_surge --clients 16 --seconds 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_mode(args):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    from app import create_app
+    from benchmarks import loadgen
+    from models import Enrollment
+    from surge import registration_queue
+
+    app = create_app({'PROPAGATE_EXCEPTIONS': False})
+    with app.app_context():
+        loadgen.generate(args.students, args.teachers, args.courses, args.enrollments, args.seed)
+        before = Enrollment.query.count()
+
+    latencies = []
+    counts = {'requests': 0, 'busy': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client_thread(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        while not stop.is_set():
+            with client.session_transaction() as s:
+                s['user_id'] = rng.randint(1, args.students)
+                s['user_name'] = 'Bench Student'
+                s['role'] = 'student'
+            start = time.perf_counter()
+            response = client.post('/api/student/register', json={'courseId': rng.randint(1, args.courses)})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                counts['requests'] += 1
+                counts['busy'] += response.status_code == 503
+                counts['errors'] += response.status_code >= 500 and response.status_code != 503
+
+    threads = [threading.Thread(target=client_thread, args=(i,)) for i in range(args.clients)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        # Queued registrations still count once they are committed
+        registration_queue.join()
+        elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        enrolled = Enrollment.query.count() - before
+
+    latencies.sort()
+    counts.update({
+        'enrolled': enrolled,
+        'enrollments_per_s': round(enrolled / elapsed, 1),
+        'requests_per_s': round(counts['requests'] / args.seconds, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        'batches': registration_queue.batches,
+    })
+    print(json.dumps(counts))
+
+
+def main():
+    from benchmarks import loadgen
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    loadgen.add_arguments(parser)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args)
+        return
+
+    print(f"{'mode':8} {'enrolled/s':>11} {'requests/s':>11} {'p50 ms':>8} {'p95 ms':>8} {'503s':>6} {'errors':>7} {'batches':>8}")
+    for mode in ('inline', 'surge'):
+        env = dict(os.environ, REGISTRATION_SURGE_MODE='1' if mode == 'surge' else '0')
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.registration_surge', '--child'] + sys.argv[1:],
+            env=env, text=True
+        )
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:8} {r['enrollments_per_s']:11} {r['requests_per_s']:11} {r['p50_ms']:8} "
+              f"{r['p95_ms']:8} {r['busy']:6} {r['errors']:7} {r['batches']:8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Drive the real routes from many threads and report latency percentiles.
+
+Generates a throwaway database (see loadgen.py), then hammers each route
+through the Flask test client and prints p50/p95/p99 latency and throughput.
+--out writes the results as sorted JSON so runs can be diffed between commits.
+
+    python -m benchmarks.routes --students 20000 --courses 2000 --enrollments 100000 --out before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from app import create_app  # noqa: E402
+from benchmarks import loadgen  # noqa: E402
+
+app = create_app()
+
+# name: (method, path, role that makes the request)
+ROUTES = {
+    'student_dashboard': ('GET', '/student/dashboard', 'student'),
+    'student_register': ('GET', '/student/register', 'student'),
+    'course_search': ('GET', '/api/courses/search?q=data+str', 'student'),
+    'teacher_dashboard': ('GET', '/teacher/dashboard', 'teacher'),
+    'admin_dashboard': ('GET', '/admin/dashboard', 'admin'),
+    'api_grades': ('GET', '/api/grades', None),
+    'api_student_register': ('POST', '/api/student/register', 'student'),
+}
+
+
+def _login(client, role, user_id):
+    with client.session_transaction() as s:
+        s.clear()
+        if role:
+            s['user_id'] = user_id
+            s['user_name'] = f'{role} {user_id}'
+            s['role'] = role
+
+
+def bench_route(name, threads, requests, counts):
+    method, path, role = ROUTES[name]
+    latencies = []
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        for _ in range(requests):
+            user_id = rng.randint(1, counts['teachers'] if role == 'teacher' else counts['students'])
+            _login(client, role, 1 if role == 'admin' else user_id)
+            body = {'courseId': rng.randint(1, counts['courses'])} if method == 'POST' else None
+
+            start = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    # app.py logs every request with print(); keep that out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    loadgen.add_arguments(parser)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=25, help='requests per thread per route')
+    parser.add_argument('--routes', nargs='*', default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument('--out', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    counts = {'students': args.students, 'teachers': args.teachers,
+              'courses': args.courses, 'enrollments': args.enrollments}
+    with app.app_context():
+        counts['enrollments'] = loadgen.generate(
+            args.students, args.teachers, args.courses, args.enrollments, args.seed
+        )
+
+    results = {}
+    print(f"{'route':22} {'reqs':>6} {'errs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name in args.routes:
+        r = bench_route(name, args.threads, args.requests, counts)
+        results[name] = r
+        print(f"{name:22} {r['requests']:6} {r['errors']:5} {r['p50_ms']:8} "
+              f"{r['p95_ms']:8} {r['p99_ms']:8} {r['throughput_rps']:8}")
+
+    if args.out:
+        report = {
+            'revision': _git_revision(),
+            'data': counts,
+            'threads': args.threads,
+            'requests_per_thread': args.requests,
+            'routes': results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Read/write throughput with the 'default' vs 'production' SQLite profile.
+
+Each profile runs in its own process (the profile is fixed when the engine is
+created) against a fresh generated database. Reader threads load student
+dashboards while writer threads update grades and enroll students; the run
+reports operations per second and failed ("database is locked") requests.
+
+    python -m benchmarks.sqlite_profile --readers 8 --writers 8 --seconds 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_profile(args):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    from app import create_app
+    from benchmarks import loadgen
+
+    app = create_app({'PROPAGATE_EXCEPTIONS': False})  # count lock errors as 500s
+    with app.app_context():
+        loadgen.generate(args.students, args.teachers, args.courses, args.enrollments, args.seed)
+
+    counts = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        while not stop.is_set():
+            with client.session_transaction() as s:
+                s['user_id'] = rng.randint(1, args.students)
+                s['user_name'] = 'Bench Student'
+                s['role'] = 'student'
+            failed = client.get('/student/dashboard').status_code >= 500
+            with lock:
+                counts['reads'] += 1
+                counts['read_errors'] += failed
+
+    def writer(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        while not stop.is_set():
+            grading = rng.random() < 0.5
+            with client.session_transaction() as s:
+                s['user_id'] = 1 if grading else rng.randint(1, args.students)
+                s['user_name'] = 'Bench User'
+                s['role'] = 'admin' if grading else 'student'
+            if grading:
+                response = client.put(f'/api/admin/enrollments/{rng.randint(1, args.enrollments)}',
+                                      json={'grade': rng.randint(50, 100)})
+            else:
+                response = client.post('/api/student/register',
+                                       json={'courseId': rng.randint(1, args.courses)})
+            with lock:
+                counts['writes'] += 1
+                counts['write_errors'] += response.status_code >= 500
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(args.writers)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+    counts['reads_per_s'] = round(counts['reads'] / args.seconds, 1)
+    counts['writes_per_s'] = round(counts['writes'] / args.seconds, 1)
+    print(json.dumps(counts))
+
+
+def main():
+    from benchmarks import loadgen
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    loadgen.add_arguments(parser)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_profile(args)
+        return
+
+    print(f"{'profile':11} {'reads/s':>9} {'writes/s':>9} {'read errs':>10} {'write errs':>11}")
+    for profile in ('default', 'production'):
+        env = dict(os.environ, SQLITE_PROFILE=profile)
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.sqlite_profile', '--child'] + sys.argv[1:],
+            env=env, text=True
+        )
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:11} {r['reads_per_s']:9} {r['writes_per_s']:9} "
+              f"{r['read_errors']:10} {r['write_errors']:11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Per-worker startup cost: importing app.py and building the app.
+
+Every sample runs in a fresh interpreter (imports are cached after the first)
+against the same throwaway database, for each ADMIN_PANEL mode. It reports
+the median time to import app.py, to run create_app() and to serve the first
+page, the peak memory at that point, and the time of the first admin panel
+request - which in 'lazy' mode includes building the panel.
+
+    python -m benchmarks.startup --samples 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ('eager', 'lazy', 'off')
+
+
+def measure(mode):
+    start = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = app_module.create_app({'ADMIN_PANEL': mode})
+        created = time.perf_counter()
+
+        client = app.test_client()
+        client.get('/student/login')
+        first_page = time.perf_counter()
+        # ru_maxrss is in kilobytes on Linux
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        with client.session_transaction() as s:
+            s['user_id'] = 1
+            s['role'] = 'admin'
+        before_admin = time.perf_counter()
+        client.get('/admin/student_admin/')
+        first_admin = time.perf_counter()
+
+    return {
+        'import_ms': (imported - start) * 1000,
+        'create_app_ms': (created - imported) * 1000,
+        'first_page_ms': (first_page - created) * 1000,
+        'peak_mb': peak_mb,
+        'first_admin_ms': (first_admin - before_admin) * 1000 if mode != 'off' else None,
+    }
+
+
+def sample(mode):
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'benchmarks.startup', '--child', mode], text=True
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5, help='fresh processes per mode')
+    parser.add_argument('--modes', nargs='*', default=list(MODES), choices=MODES)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    # The first boot creates the schema; workers normally start on an existing one
+    sample('off')
+
+    print(f"{'mode':6} {'import ms':>10} {'create ms':>10} {'1st page ms':>12} {'peak MB':>8} {'1st admin ms':>13}")
+    for mode in args.modes:
+        runs = [sample(mode) for _ in range(args.samples)]
+        median = {key: statistics.median(r[key] for r in runs) if runs[0][key] is not None else None
+                  for key in runs[0]}
+        admin = f"{median['first_admin_ms']:13.1f}" if median['first_admin_ms'] is not None else f"{'-':>13}"
+        print(f"{mode:6} {median['import_ms']:10.1f} {median['create_app_ms']:10.1f} "
+              f"{median['first_page_ms']:12.1f} {median['peak_mb']:8.1f} {admin}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Render time of the catalog and roster tables, with and without template caching.
+
+Each mode runs in its own process against one generated database with
+--courses courses, one of which has a --roster student roster:
+  none       no bytecode cache, no fragment cache
+  bytecode   templates loaded from a warm shared bytecode cache
+  fragments  bytecode cache plus the fragment cache
+Reports the first render of both pages in the fresh process (template
+compilation included), then the median render of the whole catalog in the
+admin dashboard template (warm, and with one course's seat count changed
+before each render) and of the big course's roster page.
+
+    python -m benchmarks.template_render --courses 5000 --roster 3000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    'none': {'JINJA_BYTECODE_CACHE_DIR': '', 'FRAGMENT_CACHE_SIZE': '0'},
+    'bytecode': {'FRAGMENT_CACHE_SIZE': '0'},
+    'fragments': {},
+}
+ROSTER_COURSE = 1
+
+
+def setup(args):
+    from sqlalchemy import insert
+    from app import create_app
+    from benchmarks import loadgen
+    from models import db, Course, Enrollment
+
+    app = create_app()
+    with app.app_context():
+        loadgen.generate(max(args.students, args.roster), args.teachers, args.courses, args.enrollments, args.seed)
+        # Give one course a roster of several thousand students
+        Enrollment.query.filter_by(course_id=ROSTER_COURSE).delete()
+        db.session.execute(insert(Enrollment), [
+            {'student_id': i, 'course_id': ROSTER_COURSE, 'grade': 60 + i % 40 if i % 3 else None}
+            for i in range(1, args.roster + 1)
+        ])
+        course = db.session.get(Course, ROSTER_COURSE)
+        course.capacity = course.enrolled_count = args.roster
+        db.session.commit()
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 2)
+
+
+def run_mode(args):
+    from flask import render_template
+    from app import create_app
+    from catalog import load_catalog, patch_seat_count
+    from models import db, Course
+
+    app = create_app({'ADMIN_PANEL': 'off'})
+    with app.app_context():
+        teacher_id = db.session.get(Course, ROSTER_COURSE).teacher_id
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user_id'] = teacher_id
+        s['role'] = 'teacher'
+
+    def render_catalog():
+        with app.test_request_context('/admin/dashboard'):
+            classes = load_catalog()
+            return render_template('admin_dashboard.html', classes=classes, sort='name', order='asc',
+                                   limit=len(classes), next_cursor=None, first_page=True)
+
+    def render_roster():
+        response = client.get(f'/professor/course/{ROSTER_COURSE}')
+        assert response.status_code == 200, response.status_code
+
+    def render_changed_catalog():
+        patch_seat_count(ROSTER_COURSE + 1, 1)
+        render_catalog()
+
+    start = time.perf_counter()
+    render_catalog()
+    render_roster()
+    first_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    result = {
+        'first_ms': first_ms,
+        'catalog_ms': _median_ms(render_catalog, args.repeat),
+        'catalog_changed_ms': _median_ms(render_changed_catalog, args.repeat),
+        'roster_ms': _median_ms(render_roster, args.repeat),
+    }
+    print(json.dumps(result))
+
+
+def main():
+    from benchmarks import loadgen
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    loadgen.add_arguments(parser)
+    parser.set_defaults(courses=5000, enrollments=50000, students=5000)
+    parser.add_argument('--roster', type=int, default=3000, help='students in the big course')
+    parser.add_argument('--repeat', type=int, default=20, help='renders per measurement')
+    parser.add_argument('--child', choices=['setup'] + list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'setup':
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup(args)
+        return
+    if args.child:
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            run_mode(args)
+        print(log.getvalue().strip().splitlines()[-1])
+        return
+
+    scratch = tempfile.mkdtemp()
+    base_env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+        JINJA_BYTECODE_CACHE_DIR=os.path.join(scratch, 'jinja_cache'),
+    )
+
+    def child(mode):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.template_render', '--child', mode] + sys.argv[1:],
+            env=dict(base_env, **MODES.get(mode, {})), text=True
+        )
+        return output.strip().splitlines()[-1] if output.strip() else None
+
+    child('setup')
+    # Fill the shared bytecode cache, as the first worker to start would
+    child('bytecode')
+
+    print(f"{'mode':10} {'first ms':>9} {'catalog ms':>11} {'1 changed ms':>13} {'roster ms':>10}")
+    for mode in MODES:
+        r = json.loads(child(mode))
+        print(f"{mode:10} {r['first_ms']:9} {r['catalog_ms']:11} {r['catalog_changed_ms']:13} {r['roster_ms']:10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Measure how dashboard latency grows with past terms, with and without rollover.
+
+Builds the same history twice in a throwaway database: once leaving every
+term's enrollments in the live table, once rolling each closed term over into
+archived_enrollments (see terms.py). After each new term it times the student
+dashboard, teacher dashboard and grades API.
+
+    python -m benchmarks.term_history --terms 8 --students 5000 --courses 500 --enrollments 25000
+"""
+import argparse
+import contextlib
+import io
+import random
+
+from benchmarks.routes import app, bench_route, loadgen
+from sqlalchemy import insert
+from catalog import invalidate_catalog
+from models import db, Course, Enrollment
+from schema import upgrade_schema
+from terms import rollover_term
+
+BENCH_ROUTES = ['student_dashboard', 'teacher_dashboard', 'api_grades']
+
+
+def _add_term(term, number, counts, rng):
+    """Add one term's worth of courses and enrollments, numbered after the last"""
+    first = number * counts['courses'] + 1
+    course_ids = range(first, first + counts['courses'])
+    db.session.execute(insert(Course), [
+        {'id': course_id, 'name': f'{rng.choice(loadgen.FIELDS)} {course_id}', 'description': '',
+         'capacity': 1000, 'teacher_id': rng.randint(1, counts['teachers']), 'term': term}
+        for course_id in course_ids
+    ])
+
+    pairs = set()
+    while len(pairs) < counts['enrollments']:
+        pairs.add((rng.randint(1, counts['students']), rng.choice(course_ids)))
+    db.session.execute(insert(Enrollment), [
+        {'student_id': student_id, 'course_id': course_id, 'grade': round(rng.uniform(50, 100), 1)}
+        for student_id, course_id in sorted(pairs)
+    ])
+    db.session.commit()
+
+
+def run(archive, args, counts):
+    with app.app_context():
+        db.drop_all()
+        with contextlib.redirect_stdout(io.StringIO()):
+            upgrade_schema()
+        # Term 0's courses come from loadgen, in the default term
+        loadgen.generate(args.students, args.teachers, args.courses, args.enrollments, args.seed)
+
+    rng = random.Random(args.seed)
+    rows = []
+    for number in range(1, args.terms + 1):
+        previous = app.config['CURRENT_TERM']
+        term = f'term-{number}'
+        with app.app_context():
+            _add_term(term, number, counts, rng)
+            app.config['CURRENT_TERM'] = term
+            invalidate_catalog()
+            if archive:
+                for _ in rollover_term(previous):
+                    pass
+            live = Enrollment.query.count()
+
+        results = {name: bench_route(name, args.threads, args.requests, counts) for name in BENCH_ROUTES}
+        rows.append((number, live, results))
+        print(f"{'rollover' if archive else 'no rollover':12} {number:5} {live:9}   " +
+              '  '.join(f"{results[name]['p50_ms']:8} {results[name]['p95_ms']:8}" for name in BENCH_ROUTES))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    loadgen.add_arguments(parser)
+    parser.add_argument('--terms', type=int, default=6, help='past terms to add')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=25, help='requests per thread per route')
+    args = parser.parse_args()
+
+    counts = {'students': args.students, 'teachers': args.teachers,
+              'courses': args.courses, 'enrollments': args.enrollments}
+    start_term = app.config['CURRENT_TERM']
+
+    print(f"{'':12} {'terms':>5} {'live rows':>9}   " +
+          '  '.join(f"{name[:17]:>17}" for name in BENCH_ROUTES))
+    print(f"{'':12} {'':5} {'':9}   " + '  '.join(f"{'p50 ms':>8} {'p95 ms':>8}" for _ in BENCH_ROUTES))
+    for archive in (False, True):
+        app.config['CURRENT_TERM'] = start_term
+        run(archive, args, counts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+import base64
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import column, func, literal_column, table, tuple_
+from models import db, Course, current_term, NO_TEACHER
+from course_search import SEARCH_TABLE
+
+# COURSE CATALOG QUERIES
+# One query returns every course together with its teacher's name and
+# enrollment count, so pages listing courses never run a COUNT(*) per course.
+# Counts come from the maintained courses.enrolled_count column and names
+# from courses.teacher_name (see below), so there is no join either.
+# Listings only show the current term's courses; a single course is found by
+# id whatever its term.
+
+
+def catalog_query(teacher_id=None, course_id=None):
+    """Build the course/teacher/enrollment-count query"""
+    query = db.session.query(Course, Course.teacher_name, Course.enrolled_count)
+
+    if teacher_id is not None:
+        query = query.filter(Course.teacher_id == teacher_id)
+    if course_id is not None:
+        query = query.filter(Course.id == course_id)
+    else:
+        query = query.filter(Course.term == current_term())
+
+    return query
+
+
+def _entries(query):
+    entries = []
+    for course, teacher_name, enrolled in query:
+        entries.append({
+            'id': course.id,
+            'name': course.name,
+            'description': course.description,
+            'capacity': course.capacity,
+            'teacher_id': course.teacher_id,
+            'term': course.term,
+            'professor': teacher_name,
+            'enrolled': enrolled,
+        })
+    return entries
+
+
+def _query_catalog(teacher_id=None, course_id=None):
+    return _entries(catalog_query(teacher_id, course_id).order_by(Course.id))
+
+
+# DENORMALIZED TEACHER NAMES
+# courses.teacher_name copies the teacher's name so the catalog can sort by
+# professor from the (term, teacher_name) index; sorting on the joined
+# teachers.name needed a temp B-tree over every course in the term. Triggers
+# keep the copy current on every write path, like the version stamps.
+
+_NAME_OF_TEACHER = f"COALESCE((SELECT name FROM teachers WHERE id = NEW.teacher_id), '{NO_TEACHER}')"
+
+TEACHER_NAME_TRIGGERS = {
+    'teacher_name_course_insert': (
+        "AFTER INSERT ON courses",
+        f"UPDATE courses SET teacher_name = {_NAME_OF_TEACHER} WHERE id = NEW.id;",
+    ),
+    'teacher_name_course_update': (
+        "AFTER UPDATE OF teacher_id ON courses",
+        f"UPDATE courses SET teacher_name = {_NAME_OF_TEACHER} WHERE id = NEW.id;",
+    ),
+    'teacher_name_teacher_update': (
+        "AFTER UPDATE OF name ON teachers",
+        "UPDATE courses SET teacher_name = NEW.name WHERE teacher_id = NEW.id;",
+    ),
+    'teacher_name_teacher_delete': (
+        "AFTER DELETE ON teachers",
+        f"UPDATE courses SET teacher_name = '{NO_TEACHER}' WHERE teacher_id = OLD.id;",
+    ),
+}
+
+
+def rebuild_teacher_names():
+    """Copy every course's teacher name from scratch"""
+    db.session.execute(db.text(
+        f"UPDATE courses SET teacher_name = "
+        f"COALESCE((SELECT name FROM teachers WHERE teachers.id = courses.teacher_id), '{NO_TEACHER}')"
+    ))
+    db.session.commit()
+
+
+# KEYSET PAGINATION
+# Pages are fetched with WHERE (sort_column, id) > (last value, last id)
+# instead of OFFSET, so every page costs the same however deep it is. The
+# cursor handed to the client is that (value, id) pair, base64-encoded.
+
+SORT_COLUMNS = {
+    'id': Course.id,
+    'name': Course.name,
+    'professor': Course.teacher_name,
+    'capacity': Course.capacity,
+    'enrolled': Course.enrolled_count,
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(entry, sort):
+    raw = json.dumps([entry[sort], entry['id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    return value, last_id
+
+
+def _query_catalog_page(sort, descending, after, limit):
+    column = SORT_COLUMNS[sort]
+    query = catalog_query()
+
+    if after is not None:
+        key = tuple_(column, Course.id)
+        last = tuple_(*after)
+        query = query.filter(key < last if descending else key > last)
+
+    if descending:
+        query = query.order_by(column.desc(), Course.id.desc())
+    else:
+        query = query.order_by(column, Course.id)
+
+    return _entries(query.limit(limit))
+
+
+# COURSE SEARCH
+# Full-text search through the course_search index (see course_search.py).
+# Every word typed must match, each as a prefix since the student may still be
+# typing it, and results are ranked by bm25 with matches in the course name
+# counting most. Relevance order has no stable key to seek from, so search
+# pages are offsets: the cursor is simply where the next page starts.
+
+SEARCH_WEIGHTS = (10.0, 1.0, 4.0)  # name, description, professor
+MAX_SEARCH_WORDS = 8
+
+_search_index = table(SEARCH_TABLE, column('rowid'))
+
+
+def match_query(text):
+    """Turn what the user typed into an FTS5 query ('' if there are no words)"""
+    words = re.findall(r'\w+', text.lower())[:MAX_SEARCH_WORDS]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _query_search_page(match, offset, limit):
+    rank = func.bm25(literal_column(SEARCH_TABLE), *SEARCH_WEIGHTS)
+    query = (
+        catalog_query()
+        .join(_search_index, _search_index.c.rowid == Course.id)
+        .filter(literal_column(SEARCH_TABLE).op('MATCH')(match))
+        .order_by(rank, Course.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    return _entries(query)
+
+
+# CATALOG CACHE
+# Courses change rarely, so catalog listings are kept in memory. Entries are
+# keyed by a catalog version: course/teacher edits bump the version (dropping
+# everything), while enrollments only patch the seat counts in place (pages
+# sorted by seat count are dropped instead, see _drop_seat_sorted). Each
+# worker process has its own cache, so the TTL bounds how stale another
+# worker's copy can get.
+#
+# Pages with an ETag can't rely on the TTL: a stale body sent under a new
+# ETag would be revalidated with 304 for good. They pass the 'courses' and
+# 'seats' version stamps they read to sync_catalog() (writes from any
+# process bump them), so the body is never older than its ETag. A moved
+# 'courses' stamp drops the cache; a moved 'seats' stamp, which registration
+# moves on nearly every request, only re-reads the seat counts of the cached
+# courses (one query) and sets them in place, like the local patches.
+
+CATALOG_CACHE_SIZE = 128
+CATALOG_CACHE_TTL = 30  # seconds
+
+
+class CatalogCache:
+    def __init__(self, max_entries=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self.courses_stamp = None
+        self.seats_stamp = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        with self._lock:
+            version = self.version
+            cached = self._entries.get((version, key))
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                self._entries.move_to_end((version, key))
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        value = loader()
+
+        with self._lock:
+            # Don't store a result that a concurrent write has already outdated
+            if version == self.version:
+                self._entries[(version, key)] = (time.monotonic(), value)
+                self._entries.move_to_end((version, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def bump(self):
+        """Invalidate every entry (course or teacher details changed)"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def sync(self, courses_stamp, seats_stamp):
+        """Invalidate every entry if courses_stamp moved since the last sync.
+        If only seats_stamp moved, return the ids of the cached courses, whose
+        counts the caller re-reads and passes to set_seats()
+        """
+        with self._lock:
+            if courses_stamp != self.courses_stamp:
+                self.courses_stamp, self.seats_stamp = courses_stamp, seats_stamp
+                self.version += 1
+                self._entries.clear()
+                return set()
+            if seats_stamp == self.seats_stamp:
+                return set()
+            course_ids = {entry['id'] for _, entries in self._entries.values() for entry in entries}
+            if not course_ids:
+                self.seats_stamp = seats_stamp
+            return course_ids
+
+    def set_seats(self, counts, seats_stamp):
+        """Set the enrolled counts ({course id: enrolled}) read at seats_stamp"""
+        with self._lock:
+            for _, entries in self._entries.values():
+                for entry in entries:
+                    if entry['id'] in counts:
+                        entry['enrolled'] = counts[entry['id']]
+            self._drop_seat_sorted()
+            self.seats_stamp = seats_stamp
+
+    def patch_seats(self, course_id, delta):
+        """Adjust a course's enrolled count in every cached listing"""
+        with self._lock:
+            for _, entries in self._entries.values():
+                for entry in entries:
+                    if entry['id'] == course_id:
+                        entry['enrolled'] += delta
+            self._drop_seat_sorted()
+
+    def _drop_seat_sorted(self):
+        # A page sorted by seat count can't be patched: its rows and the
+        # cursor to the next page follow the old counts
+        for cache_key in [cache_key for cache_key in self._entries if cache_key[1][:2] == ('page', 'enrolled')]:
+            del self._entries[cache_key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+catalog_cache = CatalogCache()
+
+
+def load_catalog(teacher_id=None, course_id=None):
+    """Return the catalog as a list of plain dicts (served from the cache).
+
+    The dicts are shared with the cache, so callers must not modify them.
+    """
+    return catalog_cache.get(
+        (teacher_id, course_id),
+        lambda: _query_catalog(teacher_id, course_id)
+    )
+
+
+def invalidate_catalog():
+    """Call after creating, editing or deleting a course or teacher"""
+    catalog_cache.bump()
+
+
+def sync_catalog(stamps):
+    """Call with the version stamps (from versions.read_stamps) a page's ETag
+    was built from, before loading the catalog for its body"""
+    course_ids = catalog_cache.sync(stamps['courses'], stamps['seats'])
+    if course_ids:
+        counts = db.session.query(Course.id, Course.enrolled_count).filter(Course.id.in_(course_ids))
+        catalog_cache.set_seats(dict(counts), stamps['seats'])
+
+
+def patch_seat_count(course_id, delta):
+    """Call after an enrollment for course_id is created (+1) or removed (-1)"""
+    catalog_cache.patch_seats(course_id, delta)
+
+
+def load_catalog_page(sort='name', order='asc', after=None, limit=DEFAULT_PAGE_SIZE):
+    """Return (entries, next_cursor) for one page of the catalog.
+
+    Raises ValueError for an unknown sort column, order or a bad cursor.
+    next_cursor is None on the last page.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column '{sort}'")
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"Unknown sort order '{order}'")
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    position = decode_cursor(after) if after else None
+
+    entries = catalog_cache.get(
+        ('page', sort, order, after, limit),
+        lambda: _query_catalog_page(sort, order == 'desc', position, limit)
+    )
+
+    next_cursor = encode_cursor(entries[-1], sort) if len(entries) == limit else None
+    return entries, next_cursor
+
+
+def search_catalog(text, after=None, limit=DEFAULT_PAGE_SIZE):
+    """Return (entries, next_cursor) for one page of courses matching text,
+    best match first. Raises ValueError for a bad cursor.
+    """
+    match = match_query(text)
+    if not match:
+        return [], None
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    try:
+        offset = int(after) if after else 0
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+
+    # One extra row tells us whether there is another page
+    entries = _query_search_page(match, offset, limit)
+    next_cursor = str(offset + limit) if len(entries) > limit else None
+    return entries[:limit], next_cursor
+
+
+def load_catalog_entry(course_id):
+    """Return a single course's catalog dict, or None if it doesn't exist"""
+    entries = load_catalog(course_id=course_id)
+    return entries[0] if entries else None
@@ -0,0 +1,55 @@
+from models import db
+
+# COURSE SEARCH INDEX
+# course_search is an SQLite FTS5 table holding each course's name,
+# description and teacher name, with rowid = course id. Triggers on courses
+# and teachers keep it in step with every write path (routes, roster import,
+# the admin panel), the same way the version and grade-stats triggers work.
+# prefix='2 3' adds prefix indexes so as-you-type queries ("dat*") stay fast.
+# The query side is catalog.search_catalog().
+
+SEARCH_TABLE = 'course_search'
+
+_TEACHER_NAME = "COALESCE((SELECT name FROM teachers WHERE id = NEW.teacher_id), '')"
+_INDEX_COURSE = (
+    f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, description, professor) "
+    f"VALUES (NEW.id, NEW.name, COALESCE(NEW.description, ''), {_TEACHER_NAME});"
+)
+
+SEARCH_TRIGGERS = {
+    'search_course_insert': ("AFTER INSERT ON courses", _INDEX_COURSE),
+    'search_course_update': ("AFTER UPDATE OF name, description, teacher_id ON courses", _INDEX_COURSE),
+    'search_course_delete': (
+        "AFTER DELETE ON courses",
+        f"DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;",
+    ),
+    'search_teacher_update': (
+        "AFTER UPDATE OF name ON teachers",
+        f"UPDATE {SEARCH_TABLE} SET professor = NEW.name "
+        f"WHERE rowid IN (SELECT id FROM courses WHERE teacher_id = NEW.id);",
+    ),
+    'search_teacher_delete': (
+        "AFTER DELETE ON teachers",
+        f"UPDATE {SEARCH_TABLE} SET professor = '' "
+        f"WHERE rowid IN (SELECT id FROM courses WHERE teacher_id = OLD.id);",
+    ),
+}
+
+
+def create_search_table():
+    db.session.execute(db.text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"name, description, professor, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    db.session.commit()
+
+
+def rebuild_search_index():
+    """Re-index every course from scratch"""
+    db.session.execute(db.text(f"DELETE FROM {SEARCH_TABLE}"))
+    db.session.execute(db.text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, name, description, professor) "
+        f"SELECT courses.id, courses.name, COALESCE(courses.description, ''), COALESCE(teachers.name, '') "
+        f"FROM courses LEFT JOIN teachers ON teachers.id = courses.teacher_id"
+    ))
+    db.session.commit()
@@ -0,0 +1,215 @@
+from collections import Counter
+from sqlalchemy import bindparam, insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Course, Enrollment
+from catalog import patch_seat_count
+
+# ENROLLMENT ADMISSION
+# Seats are claimed with a single conditional UPDATE on courses.enrolled_count,
+# so two students racing for the last seat can't both get it and admission
+# never has to count the enrollments table.
+
+
+def adjust_enrolled_count(course_id, delta):
+    """Add delta to a course's enrolled_count (no capacity check)"""
+    db.session.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        .values(enrolled_count=Course.enrolled_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reserve_seat(course_id):
+    """Claim a seat if one is free. Returns True if the seat was claimed"""
+    result = db.session.execute(
+        update(Course)
+        .where(Course.id == course_id, Course.enrolled_count < Course.capacity)
+        .values(enrolled_count=Course.enrolled_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def admit_student(student_id, course_id):
+    """Enroll a student if the course has room, all in one transaction.
+
+    Returns one of 'enrolled', 'full' or 'duplicate'.
+    """
+    if not reserve_seat(course_id):
+        db.session.rollback()
+        return 'full'
+
+    db.session.add(Enrollment(student_id=student_id, course_id=course_id))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Unique constraint hit - rolling back also gives the seat back
+        db.session.rollback()
+        return 'duplicate'
+
+    patch_seat_count(course_id, 1)
+    return 'enrolled'
+
+
+def admit_student_batch(student_id, course_ids):
+    """Enroll a student in several courses in one transaction.
+
+    Existence, duplicate and capacity checks are one query each for the whole
+    batch. Returns {course_id: status} with statuses 'enrolled', 'full',
+    'duplicate' or 'not_found'.
+    """
+    course_ids = list(dict.fromkeys(course_ids))
+    results = {course_id: 'not_found' for course_id in course_ids}
+
+    existing = {
+        course_id for (course_id,) in
+        db.session.query(Course.id).filter(Course.id.in_(course_ids))
+    }
+    already = {
+        course_id for (course_id,) in
+        db.session.query(Enrollment.course_id)
+        .filter(Enrollment.student_id == student_id, Enrollment.course_id.in_(existing))
+    }
+    for course_id in already:
+        results[course_id] = 'duplicate'
+
+    wanted = existing - already
+    if not wanted:
+        db.session.rollback()
+        return results
+
+    # One conditional UPDATE claims a seat in every course that has room
+    reserved = [
+        course_id for (course_id,) in db.session.execute(
+            update(Course)
+            .where(Course.id.in_(wanted), Course.enrolled_count < Course.capacity)
+            .values(enrolled_count=Course.enrolled_count + 1)
+            .returning(Course.id)
+            .execution_options(synchronize_session=False)
+        )
+    ]
+    for course_id in wanted:
+        results[course_id] = 'full'
+
+    if reserved:
+        db.session.execute(
+            insert(Enrollment),
+            [{'student_id': student_id, 'course_id': course_id} for course_id in reserved]
+        )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request enrolled them in one of these first. Nothing
+        # was kept, so start over - the duplicate check will now see it
+        db.session.rollback()
+        return admit_student_batch(student_id, course_ids)
+
+    for course_id in reserved:
+        results[course_id] = 'enrolled'
+        patch_seat_count(course_id, 1)
+    return results
+
+
+def admit_queued(requests):
+    """Admit a batch of queued (student_id, course_id) registrations in one
+    transaction, first come first served.
+
+    Like admit_student_batch() but across many students: existence,
+    duplicate and capacity checks are one query each, seats are claimed with
+    one UPDATE per course and the enrollments go in with one executemany.
+    Returns a status per request, in order: 'enrolled', 'full', 'duplicate'
+    or 'not_found'.
+    """
+    course_ids = {course_id for _, course_id in requests}
+    seats = {
+        course_id: (enrolled, capacity) for course_id, enrolled, capacity in
+        db.session.query(Course.id, Course.enrolled_count, Course.capacity)
+        .filter(Course.id.in_(course_ids))
+    }
+    already = set(
+        db.session.query(Enrollment.student_id, Enrollment.course_id)
+        .filter(tuple_(Enrollment.student_id, Enrollment.course_id).in_(set(requests)))
+    )
+
+    statuses = []
+    granted = Counter()
+    admitted = []
+    for student_id, course_id in requests:
+        if course_id not in seats:
+            statuses.append('not_found')
+        elif (student_id, course_id) in already:
+            statuses.append('duplicate')
+        elif seats[course_id][0] + granted[course_id] >= seats[course_id][1]:
+            statuses.append('full')
+        else:
+            granted[course_id] += 1
+            already.add((student_id, course_id))
+            admitted.append({'student_id': student_id, 'course_id': course_id})
+            statuses.append('enrolled')
+
+    if not admitted:
+        db.session.rollback()
+        return statuses
+
+    # Each course's count only moves if it still holds the value read above
+    claimed = db.session.execute(
+        update(Course.__table__)
+        .where(Course.__table__.c.id == bindparam('b_id'))
+        .where(Course.__table__.c.enrolled_count == bindparam('b_enrolled'))
+        .values(enrolled_count=Course.__table__.c.enrolled_count + bindparam('b_granted')),
+        [
+            {'b_id': course_id, 'b_enrolled': seats[course_id][0], 'b_granted': count}
+            for course_id, count in granted.items()
+        ],
+    )
+    if claimed.rowcount != len(granted):
+        # Another process changed a seat count since we read it. Nothing was
+        # kept, so start over with fresh numbers
+        db.session.rollback()
+        return admit_queued(requests)
+
+    try:
+        db.session.execute(insert(Enrollment), admitted)
+        db.session.commit()
+    except IntegrityError:
+        # Another process enrolled one of these students first - the
+        # duplicate check will see it next time round
+        db.session.rollback()
+        return admit_queued(requests)
+
+    for course_id, count in granted.items():
+        patch_seat_count(course_id, count)
+    return statuses
+
+
+def remove_enrollment(enrollment_id):
+    """Delete an enrollment and free its seat, all in one transaction.
+
+    Returns False if there's no such enrollment.
+    """
+    enrollment = db.session.get(Enrollment, enrollment_id)
+    if enrollment is None:
+        db.session.rollback()
+        return False
+
+    course_id = enrollment.course_id
+    adjust_enrolled_count(course_id, -1)
+    db.session.delete(enrollment)
+    db.session.commit()
+    patch_seat_count(course_id, -1)
+    return True
+
+
+def recount_enrolled(course_ids):
+    """Recompute enrolled_count from the enrollments table for the given courses"""
+    for course_id in set(course_ids):
+        if course_id is None:
+            continue
+        count = Enrollment.query.filter_by(course_id=course_id).count()
+        db.session.execute(
+            update(Course)
+            .where(Course.id == course_id)
+            .values(enrolled_count=count)
+            .execution_options(synchronize_session=False)
+        )
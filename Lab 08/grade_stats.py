@@ -0,0 +1,123 @@
+from collections import defaultdict
+from models import db, CourseGradeStats, CourseGradeBucket
+
+# GRADE STATISTICS
+# course_grade_stats keeps graded/ungraded counts and the grade sum for each
+# course, and course_grade_buckets counts grades per whole point. SQLite
+# triggers adjust both whenever an enrollment is added, removed or regraded,
+# whichever endpoint (or the admin panel) made the change, so reading a
+# course's mean, median and distribution never scans its enrollments.
+# Medians are to whole-point resolution. rebuild_grade_stats() recomputes
+# everything from the enrollments table:
+#   flask --app app rebuild-grade-stats
+
+LETTER_GRADES = (('A', 90), ('B', 80), ('C', 70), ('D', 60), ('F', 0))
+
+_BUCKET = "MAX(0, MIN(100, CAST({0}.grade AS INTEGER)))"
+
+
+def _apply(row, sign):
+    """Trigger SQL adding (sign='') or removing (sign='-') row's grade from the stats"""
+    return (
+        f"INSERT INTO course_grade_stats (course_id, graded_count, ungraded_count, grade_sum) "
+        f"VALUES ({row}.course_id, {sign}({row}.grade IS NOT NULL), {sign}({row}.grade IS NULL), "
+        f"{sign}COALESCE({row}.grade, 0)) "
+        f"ON CONFLICT(course_id) DO UPDATE SET "
+        f"graded_count = graded_count + excluded.graded_count, "
+        f"ungraded_count = ungraded_count + excluded.ungraded_count, "
+        f"grade_sum = grade_sum + excluded.grade_sum; "
+        f"INSERT INTO course_grade_buckets (course_id, bucket, count) "
+        f"SELECT {row}.course_id, {_BUCKET.format(row)}, {sign}1 WHERE {row}.grade IS NOT NULL "
+        f"ON CONFLICT(course_id, bucket) DO UPDATE SET count = count + excluded.count;"
+    )
+
+
+GRADE_STATS_TRIGGERS = {
+    'grade_stats_insert': ("AFTER INSERT ON enrollments", _apply('NEW', '')),
+    'grade_stats_delete': ("AFTER DELETE ON enrollments", _apply('OLD', '-')),
+    'grade_stats_update': (
+        "AFTER UPDATE OF grade, course_id ON enrollments",
+        _apply('OLD', '-') + ' ' + _apply('NEW', ''),
+    ),
+    'grade_stats_course_delete': (
+        "AFTER DELETE ON courses",
+        "DELETE FROM course_grade_stats WHERE course_id = OLD.id; "
+        "DELETE FROM course_grade_buckets WHERE course_id = OLD.id;",
+    ),
+}
+
+
+def rebuild_grade_stats():
+    """Recompute every course's statistics from scratch"""
+    db.session.execute(db.text("DELETE FROM course_grade_stats"))
+    db.session.execute(db.text("DELETE FROM course_grade_buckets"))
+    db.session.execute(db.text(
+        "INSERT INTO course_grade_stats (course_id, graded_count, ungraded_count, grade_sum) "
+        "SELECT course_id, COUNT(grade), COUNT(*) - COUNT(grade), COALESCE(SUM(grade), 0) "
+        "FROM enrollments GROUP BY course_id"
+    ))
+    db.session.execute(db.text(
+        f"INSERT INTO course_grade_buckets (course_id, bucket, count) "
+        f"SELECT course_id, {_BUCKET.format('enrollments')}, COUNT(*) FROM enrollments "
+        f"WHERE grade IS NOT NULL GROUP BY 1, 2"
+    ))
+    db.session.commit()
+
+
+def _nth_grade(buckets, n):
+    """The n-th lowest grade (0-based) from sorted (bucket, count) pairs"""
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if n < seen:
+            return bucket
+    return None
+
+
+def _summarize(stats, buckets):
+    graded = stats.graded_count if stats else 0
+    buckets = sorted((b, c) for b, c in buckets if c > 0)
+
+    distribution = {letter: 0 for letter, _ in LETTER_GRADES}
+    for bucket, count in buckets:
+        letter = next(letter for letter, cutoff in LETTER_GRADES if bucket >= cutoff)
+        distribution[letter] += count
+
+    median = None
+    if graded:
+        low = _nth_grade(buckets, (graded - 1) // 2)
+        high = _nth_grade(buckets, graded // 2)
+        median = (low + high) / 2
+
+    return {
+        'graded': graded,
+        'ungraded': stats.ungraded_count if stats else 0,
+        'mean': round(stats.grade_sum / graded, 2) if graded else None,
+        'median': median,
+        'distribution': distribution,
+    }
+
+
+def course_grade_stats(course_id):
+    """Mean, median, letter distribution and graded/ungraded counts for a course"""
+    stats = db.session.get(CourseGradeStats, course_id)
+    buckets = db.session.query(CourseGradeBucket.bucket, CourseGradeBucket.count).filter_by(course_id=course_id)
+    return _summarize(stats, buckets)
+
+
+def all_grade_stats():
+    """course_grade_stats() for every course, as {course_id: stats}"""
+    buckets = defaultdict(list)
+    for course_id, bucket, count in db.session.query(
+        CourseGradeBucket.course_id, CourseGradeBucket.bucket, CourseGradeBucket.count
+    ):
+        buckets[course_id].append((bucket, count))
+
+    return {
+        stats.course_id: _summarize(stats, buckets[stats.course_id])
+        for stats in CourseGradeStats.query.all()
+    }
+
+
+# Statistics for a course with no enrollments yet
+NO_GRADES = _summarize(None, [])
@@ -0,0 +1,269 @@
+import csv
+import io
+import json
+from sqlalchemy import Float, Integer, column, func, select, update, values
+from models import db, Student, Course, Enrollment
+
+# BULK GRADEBOOK
+# Grades for a whole course arrive as one upload (JSON array or CSV) and are
+# written in one transaction, a batch of rows per UPDATE (see apply_grades).
+
+
+def parse_grade(value):
+    """Turn an uploaded grade into a float, or None to clear it"""
+    if value is None or (isinstance(value, str) and value.strip() == ''):
+        return None
+    return float(value)
+
+
+def read_grade_rows(req):
+    """Read (student_id, grade, version) rows from a JSON or CSV request body.
+
+    JSON bodies are a list of {"studentId": ..., "grade": ..., "version": ...}
+    objects. CSV bodies have a student_id,grade[,version] header row. The
+    version is optional (None when missing).
+    """
+    if req.mimetype == 'text/csv':
+        reader = csv.DictReader(io.StringIO(req.get_data(as_text=True)))
+        return [(row.get('student_id'), row.get('grade'), row.get('version')) for row in reader]
+
+    data = req.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of {studentId, grade, version} objects')
+
+    rows = []
+    for item in data:
+        if not isinstance(item, dict):
+            rows.append((None, None, None))
+            continue
+        rows.append((item.get('studentId', item.get('student_id')), item.get('grade'), item.get('version')))
+    return rows
+
+
+# OPTIMISTIC CONCURRENCY
+# Grade writes never lock rows. Each one is a compare-and-swap on
+# enrollments.version: the client sends back the version it read and the
+# UPDATE only matches if nobody has changed the row since, bumping the
+# version as it writes. The loser of a race gets the current grade and
+# version back (GradeConflict) instead of silently overwriting. A version of
+# None writes unconditionally, for clients that never read one.
+
+
+class GradeConflict(Exception):
+    """The enrollment was changed since the client read it"""
+
+    def __init__(self, grade, version):
+        super().__init__('Grade was changed by someone else')
+        self.grade = grade
+        self.version = version
+
+
+def parse_version(value):
+    """Turn a client-sent version into an int, or None if none was sent"""
+    if value is None or (isinstance(value, str) and value.strip() == ''):
+        return None
+    return int(value)
+
+
+def _swap_grade(criteria, grade, version):
+    """Compare-and-swap the grade of the enrollment matching criteria.
+
+    Returns the new version. Raises LookupError if there's no such
+    enrollment or GradeConflict if it's no longer at version, rolling back
+    either way. The caller commits.
+    """
+    table = Enrollment.__table__
+    statement = (
+        update(table)
+        .where(*criteria)
+        .values(grade=grade, version=table.c.version + 1)
+        .returning(table.c.version)
+    )
+    if version is not None:
+        statement = statement.where(table.c.version == version)
+
+    new_version = db.session.execute(statement).scalar()
+    if new_version is not None:
+        return new_version
+
+    current = db.session.execute(select(table.c.grade, table.c.version).where(*criteria)).first()
+    db.session.rollback()
+    if current is None:
+        raise LookupError
+    raise GradeConflict(current.grade, current.version)
+
+
+def set_grade(course_id, student_id, grade, version=None):
+    """Set one student's grade in a course and commit.
+
+    Returns the new version, or None if the student isn't enrolled in the
+    course. Raises GradeConflict if the enrollment is no longer at version.
+    """
+    table = Enrollment.__table__
+    try:
+        new_version = _swap_grade((table.c.course_id == course_id, table.c.student_id == student_id), grade, version)
+    except LookupError:
+        return None
+
+    db.session.commit()
+    return new_version
+
+
+def set_enrollment_grade(enrollment_id, grade, version=None):
+    """Set the grade on an enrollment and commit.
+
+    Returns (grade, new_version). Raises LookupError if there's no such
+    enrollment or GradeConflict if it's no longer at version.
+    """
+    new_version = _swap_grade((Enrollment.__table__.c.id == enrollment_id,), grade, version)
+    db.session.commit()
+    return grade, new_version
+
+
+def save_grades(course_id, rows):
+    """apply_grades() and commit"""
+    versions, errors = apply_grades(course_id, rows)
+    db.session.commit()
+    return versions, errors
+
+
+GRADE_BATCH_SIZE = 1000  # rows per UPDATE, well under SQLite's bound parameter limit
+
+
+def apply_grades(course_id, rows):
+    """Validate and compare-and-swap a batch of grades for one course.
+
+    rows are (student_id, grade, version) tuples, version None to write
+    unconditionally. Returns (versions, errors): the new version of each
+    updated student's enrollment, and a list of per-row error dicts. Rows
+    that lost a race are errors carrying the current grade and version, and
+    a student given more than once only keeps their first row.
+    The caller commits.
+    """
+    errors = []
+    parsed = {}
+
+    for index, (student_id, grade, version) in enumerate(rows, start=1):
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            errors.append({'row': index, 'student_id': student_id, 'error': 'Invalid student id'})
+            continue
+        if student_id in parsed:
+            first = parsed[student_id][0]
+            errors.append({'row': index, 'student_id': student_id, 'error': f'Student already given in row {first}'})
+            continue
+        try:
+            parsed[student_id] = (index, parse_grade(grade), parse_version(version))
+        except (TypeError, ValueError):
+            errors.append({'row': index, 'student_id': student_id, 'error': 'Invalid grade or version'})
+
+    # Each batch is one UPDATE ... FROM the sent rows, so the whole batch is
+    # swapped atomically and RETURNING says exactly which rows matched
+    table = Enrollment.__table__
+    versions = {}
+    items = list(parsed.items())
+    for start in range(0, len(items), GRADE_BATCH_SIZE):
+        sent = values(
+            column('student_id', Integer), column('grade', Float), column('version', Integer),
+            name='sent',
+        ).data([
+            (student_id, grade, version)
+            for student_id, (_, grade, version) in items[start:start + GRADE_BATCH_SIZE]
+        ]).cte('sent')
+        swapped = db.session.execute(
+            update(table)
+            .where(table.c.course_id == course_id)
+            .where(table.c.student_id == sent.c.student_id)
+            .where(table.c.version == func.coalesce(sent.c.version, table.c.version))
+            .values(grade=sent.c.grade, version=table.c.version + 1)
+            .returning(table.c.student_id, table.c.version)
+        )
+        versions.update(swapped.all())
+
+    # Anything that didn't match is either not enrolled or was changed by
+    # someone else; the write lock is held now, so these values are current
+    missed = [student_id for student_id in parsed if student_id not in versions]
+    current = {
+        row.student_id: row for row in db.session.execute(
+            select(table.c.student_id, table.c.grade, table.c.version)
+            .where(table.c.course_id == course_id, table.c.student_id.in_(missed))
+        )
+    } if missed else {}
+
+    for student_id in missed:
+        index = parsed[student_id][0]
+        if student_id not in current:
+            errors.append({'row': index, 'student_id': student_id, 'error': 'Enrollment not found'})
+            continue
+        errors.append({
+            'row': index,
+            'student_id': student_id,
+            'error': 'Grade was changed by someone else',
+            'grade': current[student_id].grade,
+            'version': current[student_id].version,
+        })
+
+    errors.sort(key=lambda error: error['row'])
+    return versions, errors
+
+
+# GRADEBOOK EXPORT
+# Exports stream straight from a batched joined query, so memory stays flat
+# no matter how many enrollments there are and the first rows go out before
+# the query has finished.
+
+EXPORT_COLUMNS = ('enrollment_id', 'student_id', 'student_name', 'student_email',
+                  'course_id', 'course_name', 'grade')
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_query(course_id=None):
+    """Joined Enrollment/Student/Course rows, fetched in batches"""
+    query = (
+        db.session.query(
+            Enrollment.id, Student.id, Student.name, Student.email,
+            Course.id, Course.name, Enrollment.grade,
+        )
+        .join(Student, Enrollment.student_id == Student.id)
+        .join(Course, Enrollment.course_id == Course.id)
+        .order_by(Enrollment.id)
+    )
+    if course_id is not None:
+        query = query.filter(Enrollment.course_id == course_id)
+    return query.yield_per(EXPORT_BATCH_SIZE)
+
+
+def stream_csv(rows):
+    """Yield CSV text a batch of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows):
+    """Yield one JSON object per line, a batch of rows at a time"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, row))))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
@@ -0,0 +1,42 @@
+import threading
+from flask import request
+from werkzeug.wrappers import Response
+
+# LAZY ADMIN PANEL
+# Flask-Admin, WTForms and the model views add noticeably to every worker's
+# startup, though only a few admins ever open the panel. In 'lazy' mode the
+# panel is a second Flask app, built the first time a request reaches a URL
+# under /admin/ that the main app doesn't route itself; such requests are
+# then handed straight to it. (Flask won't add routes to an app once it has
+# served a request, hence the second app rather than registering late.)
+#
+# Both apps share the secret key, so the panel sees the same login session.
+
+
+class LazyAdminPanel:
+    def __init__(self, app, build):
+        self.build = build
+        self._panel = None
+        self._lock = threading.Lock()
+
+        # '/admin/' also stands in for Flask-Admin's index endpoint, so
+        # url_for('flask_admin.index') works before the panel is built
+        methods = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+        app.add_url_rule('/admin/', 'flask_admin.index', self.forward, defaults={'path': ''}, methods=methods)
+        app.add_url_rule('/admin/<path:path>', 'admin_panel', self.forward, methods=methods)
+
+    def get(self):
+        with self._lock:
+            if self._panel is None:
+                print("Building the admin panel")
+                self._panel = self.build()
+            return self._panel
+
+    def forward(self, path):
+        # The main app hasn't read the body, so the panel gets the raw request
+        return Response.from_app(self.get(), request.environ, buffered=True)
+
+
+def setup_lazy_admin(app, build):
+    """Route /admin/ URLs the app doesn't handle to a panel app made by build()"""
+    return LazyAdminPanel(app, build)
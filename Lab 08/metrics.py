@@ -0,0 +1,149 @@
+import threading
+import time
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from catalog import catalog_cache
+from surge import registration_queue
+from template_cache import fragment_cache
+
+# REQUEST METRICS
+# Every request records its latency, the number of SQL statements it ran,
+# the time spent in the database and the response size, grouped by endpoint.
+# Served in Prometheus text format at /metrics. Requests slower than
+# SLOW_REQUEST_SECONDS are logged along with their query count.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RouteStats:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.latency = 0.0
+        self.sql_statements = 0
+        self.db_time = 0.0
+        self.response_bytes = 0
+
+    def record(self, latency, sql_statements, db_time, response_bytes):
+        self.count += 1
+        self.latency += latency
+        self.sql_statements += sql_statements
+        self.db_time += db_time
+        self.response_bytes += response_bytes
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+
+
+_routes = {}
+_lock = threading.Lock()
+
+
+# SQL statement counting (runs for every engine, only counts inside requests
+# and inside write queue jobs run for them - see sqlite_profile.JOB_COUNTERS)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'sql_statements' in g:
+        g.sql_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'sql_start' in g:
+        g.sql_statements += 1
+        g.db_time += time.perf_counter() - g.pop('sql_start')
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.sql_statements = 0
+    g.db_time = 0.0
+
+
+def _finish_request(response):
+    if 'request_start' not in g:
+        return response
+
+    latency = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or '<unmatched>'
+    # Streamed responses (e.g. grade exports) have no length up front, and
+    # asking for one would buffer the whole stream
+    size = 0 if response.is_streamed else (response.calculate_content_length() or 0)
+
+    with _lock:
+        stats = _routes.setdefault(endpoint, RouteStats())
+        stats.record(latency, g.sql_statements, g.db_time, size)
+
+    slow_after = current_app.config.get('SLOW_REQUEST_SECONDS')
+    if slow_after is not None and latency >= slow_after:
+        print(f"SLOW REQUEST {request.method} {request.path} ({endpoint}): "
+              f"{latency * 1000:.1f}ms, {g.sql_statements} SQL statements, "
+              f"{g.db_time * 1000:.1f}ms in DB, {size} bytes")
+
+    return response
+
+
+def render_metrics():
+    """Prometheus text exposition of everything recorded so far"""
+    lines = [
+        '# HELP http_request_duration_seconds Request latency by endpoint',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    with _lock:
+        routes = sorted(_routes.items())
+        for endpoint, stats in routes:
+            label = f'endpoint="{endpoint}"'
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                lines.append(f'http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+            lines.append(f'http_request_duration_seconds_sum{{{label}}} {stats.latency:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{label}}} {stats.count}')
+
+        for name, kind, help_text, attr in (
+            ('http_request_sql_statements_total', 'counter', 'SQL statements run by endpoint', 'sql_statements'),
+            ('http_request_db_seconds_total', 'counter', 'Time spent in the database by endpoint', 'db_time'),
+            ('http_response_bytes_total', 'counter', 'Response body bytes by endpoint', 'response_bytes'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for endpoint, stats in routes:
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {round(getattr(stats, attr), 6)}')
+
+    cache = catalog_cache.stats()
+    fragments = fragment_cache.stats()
+    lines += [
+        '# HELP catalog_cache_hits_total Course catalog cache hits',
+        '# TYPE catalog_cache_hits_total counter',
+        f'catalog_cache_hits_total {cache["hits"]}',
+        '# HELP catalog_cache_misses_total Course catalog cache misses',
+        '# TYPE catalog_cache_misses_total counter',
+        f'catalog_cache_misses_total {cache["misses"]}',
+        '# HELP fragment_cache_hits_total Rendered template fragments served from cache',
+        '# TYPE fragment_cache_hits_total counter',
+        f'fragment_cache_hits_total {fragments["hits"]}',
+        '# HELP fragment_cache_misses_total Template fragments rendered again',
+        '# TYPE fragment_cache_misses_total counter',
+        f'fragment_cache_misses_total {fragments["misses"]}',
+        '# HELP registration_queue_depth Registrations waiting in the surge queue',
+        '# TYPE registration_queue_depth gauge',
+        f'registration_queue_depth {registration_queue.depth()}',
+        '# HELP registration_queue_admitted_total Enrollments admitted from the surge queue',
+        '# TYPE registration_queue_admitted_total counter',
+        f'registration_queue_admitted_total {registration_queue.admitted}',
+        '# HELP registration_queue_batches_total Surge queue batches committed',
+        '# TYPE registration_queue_batches_total counter',
+        f'registration_queue_batches_total {registration_queue.batches}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def setup_metrics(app):
+    app.config.setdefault('SLOW_REQUEST_SECONDS', 0.5)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
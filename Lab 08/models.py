@@ -1,10 +1,22 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from passwords import hash_password
 
 # Initialize SQLAlchemy instance - this will be used to interact with our database
 db = SQLAlchemy()
 
+# Term that courses created before terms existed belong to
+DEFAULT_TERM = 'default'
+
+# What listings show for a course whose teacher no longer exists
+NO_TEACHER = 'No Teacher'
+
+def current_term():
+    """The term new courses go into and course listings show"""
+    return current_app.config.get('CURRENT_TERM', DEFAULT_TERM)
+
 # authentication for all
 class User(UserMixin):
     def __init__(self, id, username, role):
@@ -18,8 +30,8 @@ class Student(db.Model):
     
     # Primary key - unique identifier for each student
     id = db.Column(db.Integer, primary_key=True)
-    # Student's name
-    name = db.Column(db.String(100), nullable=False)
+    # Student's name (indexed - the grades API looks students up by name)
+    name = db.Column(db.String(100), nullable=False, index=True)
     # Unique email for login and communication
     email = db.Column(db.String(100), unique=True, nullable=False)
     # Hashed password for security
@@ -30,7 +42,7 @@ class Student(db.Model):
 
     def set_password(self, password):
         """Hash and set the student's password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Verify the provided password against the stored hash"""
@@ -44,14 +56,14 @@ class Teacher(db.Model):
     __tablename__ = 'teachers'
     
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     email = db.Column(db.String(100), unique=True, nullable=False)
     password_hash = db.Column(db.String(200), nullable=False)
     
     courses = db.relationship('Course', backref='teacher', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -67,7 +79,7 @@ class Admin(db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -77,16 +89,36 @@ class Course(db.Model):
     __tablename__ = 'courses'
     
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    # name, capacity and enrolled_count are indexed for the sortable,
+    # keyset-paginated admin course listing (together with term, see below)
+    name = db.Column(db.String(100), nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
-    capacity = db.Column(db.Integer, nullable=False, default=30)
+    capacity = db.Column(db.Integer, nullable=False, default=30, index=True)
+    # Number of enrollments, kept in step with the enrollments table so seat
+    # checks never need a COUNT(*) (see enrollments.py)
+    enrolled_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    # Term the course runs in. Listings only show the current term, and
+    # enrollments in closed terms are archived (see terms.py)
+    term = db.Column(db.String(20), nullable=False, default=current_term, server_default=DEFAULT_TERM)
+    # Copy of the teacher's name, kept current by triggers (see catalog.py),
+    # so listings can sort by professor through an index
+    teacher_name = db.Column(db.String(100), nullable=False, server_default=NO_TEACHER)
 
     # Foreign key linking to the teacher who teaches this course
-    teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'), nullable=False)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'), nullable=False, index=True)
     
     # Relationship with enrollments - allows access to students in this course
     enrollments = db.relationship('Enrollment', backref='course', lazy=True)
 
+    # Listings filter on term and sort by one of these, so each sort key
+    # gets a (term, column) index to page through in order
+    __table_args__ = (
+        db.Index('ix_courses_term_name', 'term', 'name'),
+        db.Index('ix_courses_term_capacity', 'term', 'capacity'),
+        db.Index('ix_courses_term_enrolled_count', 'term', 'enrolled_count'),
+        db.Index('ix_courses_term_teacher_name', 'term', 'teacher_name'),
+    )
+
     def __str__(self):
         return self.name
 
@@ -95,12 +127,56 @@ class Enrollment(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
     grade = db.Column(db.Float, nullable=True)
+
+    # Bumped on every change so grade edits can be compare-and-swapped (see
+    # gradebook.py). The ORM also checks it when it flushes an Enrollment
+    version = db.Column(db.Integer, nullable=False, server_default='1')
     
-    # Ensure a student can only enroll in a course once
+    # Ensure a student can only enroll in a course once (this index also
+    # serves lookups by student_id, so it doesn't need its own)
     __table_args__ = (
         db.UniqueConstraint('student_id', 'course_id', name='unique_enrollment'),
     )
-    
+    __mapper_args__ = {'version_id_col': version}
+
+# Enrollments from closed terms, moved out of the enrollments table by a term
+# rollover so the live table only holds current ones. Keeps the original id
+class ArchivedEnrollment(db.Model):
+    __tablename__ = 'archived_enrollments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # enrollments.id of the row archived here. Not the key: once a rollover
+    # empties enrollments, SQLite hands the same ids out again
+    enrollment_id = db.Column(db.Integer, nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    term = db.Column(db.String(20), nullable=False)
+    grade = db.Column(db.Float, nullable=True)
+
+# Version counters for cached pages (ETags). Bumped by triggers - see versions.py
+class VersionStamp(db.Model):
+    __tablename__ = 'version_stamps'
+
+    key = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Per-course grade statistics, maintained by triggers - see grade_stats.py
+class CourseGradeStats(db.Model):
+    __tablename__ = 'course_grade_stats'
+
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), primary_key=True)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    ungraded_count = db.Column(db.Integer, nullable=False, default=0)
+    grade_sum = db.Column(db.Float, nullable=False, default=0)
+
+
+# How many grades in a course fall on each whole point (0-100)
+class CourseGradeBucket(db.Model):
+    __tablename__ = 'course_grade_buckets'
 
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,104 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# PASSWORD HASHING
+# Password checks are deliberately slow, so login requests run them on a small
+# bounded pool instead of inline. When the pool and its queue are full the
+# login is turned away (503) rather than tying up every request worker.
+# Hashes made with an older method are upgraded on the next successful login.
+#
+# Settings (app.config):
+#   PASSWORD_HASH_METHOD  werkzeug method string, e.g. 'scrypt' or 'pbkdf2:sha256:600000'
+#   PASSWORD_WORKERS      threads hashing passwords (0 = check inline, no pool)
+#   PASSWORD_QUEUE_LIMIT  checks allowed to wait for a free thread
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many password checks are already running or queued"""
+
+
+_hash_method = 'scrypt'
+_method_prefix = None
+_executor = None
+_slots = None
+
+
+def configure_passwords(app):
+    global _hash_method, _method_prefix, _executor, _slots
+
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt')
+    app.config.setdefault('PASSWORD_WORKERS', min(4, os.cpu_count() or 1))
+    app.config.setdefault('PASSWORD_QUEUE_LIMIT', 32)
+
+    _hash_method = app.config['PASSWORD_HASH_METHOD']
+    _method_prefix = None
+
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+
+    workers = app.config['PASSWORD_WORKERS']
+    if workers > 0:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        _slots = threading.BoundedSemaphore(workers + app.config['PASSWORD_QUEUE_LIMIT'])
+    else:
+        _executor = None
+        _slots = None
+
+
+def hash_method():
+    """The configured werkzeug hash method"""
+    return _hash_method
+
+
+def hash_password(password):
+    """Hash a password with the configured method"""
+    return generate_password_hash(password, _hash_method)
+
+
+def _stored_prefix():
+    global _method_prefix
+    if _method_prefix is None:
+        # The stored form of the method (defaults filled in), e.g.
+        # 'scrypt:32768:8:1'. Working it out costs a full hash, so it is left
+        # for the first login rather than slowing down every worker's startup
+        _method_prefix = generate_password_hash('', _hash_method).split('$', 1)[0]
+    return _method_prefix
+
+
+def needs_rehash(password_hash):
+    """True if the hash was made with a different method than the configured one"""
+    return password_hash.split('$', 1)[0] != _stored_prefix()
+
+
+def _check(password_hash, password):
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash):
+        return True, hash_password(password)
+    return True, None
+
+
+def verify_password(user, password):
+    """Check a user's password on the bounded pool.
+
+    If the stored hash is out of date it is replaced on the user object
+    (the caller commits). Raises PasswordPoolBusy when the pool is full.
+    """
+    if _executor is None:
+        ok, new_hash = _check(user.password_hash, password)
+    else:
+        if not _slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = _executor.submit(_check, user.password_hash, password)
+        except Exception:
+            _slots.release()
+            raise
+        future.add_done_callback(lambda _: _slots.release())
+        ok, new_hash = future.result()
+
+    if new_hash:
+        user.password_hash = new_hash
+    return ok
@@ -0,0 +1,162 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from flask import Response, abort, current_app, g, redirect, render_template, request, send_from_directory, session, url_for
+
+# ON-DEMAND REQUEST PROFILING
+# An admin can profile a single request by sending an X-Profile: 1 header or
+# adding ?_profile=1. That request runs under cProfile and the result is
+# saved as a .prof file (open it with pstats or snakeviz), named after the
+# route and how long it took; /admin/profiles lists the recent ones. Every
+# other request only pays for one header/query-string lookup.
+#
+# cProfile only sees the request's own thread: time spent in the write
+# queue, the password pool or a streamed response body shows up as waiting.
+# One request is profiled at a time per process; a trigger that arrives
+# while another profile is running is ignored.
+#
+# Settings (app.config):
+#   PROFILE_SAMPLE_RATE  fraction of triggered requests actually profiled
+#   PROFILE_DIR          where profiles are written (default instance/profiles)
+#   PROFILE_KEEP         how many of the newest profiles to keep
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '_profile'
+PROFILE_TEXT_LINES = 60
+PROFILE_TEXT_SORTS = ('cumulative', 'tottime', 'calls')
+
+# 20261018T105501.042-main.admin_dashboard-GET-153.2ms.prof
+_FILENAME = re.compile(r'^(\d{8}T\d{6})\.\d{3}-([\w.]+)-([A-Z]+)-(\d+\.\d)ms\.prof$')
+
+_running = threading.Lock()
+
+
+def _triggered():
+    return PROFILE_HEADER in request.headers or PROFILE_ARG in request.args
+
+
+def _start_profile():
+    if not _triggered():
+        return
+    if session.get('role') != 'admin':
+        return
+    if random.random() >= current_app.config['PROFILE_SAMPLE_RATE']:
+        return
+    if not _running.acquire(blocking=False):
+        return
+
+    g.profile_start = time.perf_counter()
+    g.profile = cProfile.Profile()
+    g.profile.enable()
+
+
+def _finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+
+    profile.disable()
+    _running.release()
+    elapsed_ms = (time.perf_counter() - g.pop('profile_start')) * 1000
+
+    now = time.time()
+    name = '{}.{:03d}-{}-{}-{:.1f}ms.prof'.format(
+        time.strftime('%Y%m%dT%H%M%S', time.localtime(now)), int(now % 1 * 1000),
+        request.endpoint or 'unmatched', request.method, elapsed_ms
+    )
+    directory = current_app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    profile.dump_stats(os.path.join(directory, name))
+    _prune(directory, current_app.config['PROFILE_KEEP'])
+
+    print(f"PROFILED {request.method} {request.path}: {elapsed_ms:.1f}ms, saved as {name}")
+    response.headers['X-Profile-File'] = name
+    return response
+
+
+def _abandon_profile(exc):
+    # The request failed before after_request ran - free the profiler
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.disable()
+        _running.release()
+
+
+def _prune(directory, keep):
+    names = sorted(name for name in os.listdir(directory) if _FILENAME.match(name))
+    for name in names[:-keep] if keep else names:
+        os.remove(os.path.join(directory, name))
+
+
+def list_profiles(directory):
+    """Saved profiles, newest first, as dicts parsed from their file names"""
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        match = _FILENAME.match(name)
+        if not match:
+            continue
+        taken, endpoint, method, elapsed_ms = match.groups()
+        profiles.append({
+            'name': name,
+            'taken': time.strftime('%Y-%m-%d %H:%M:%S', time.strptime(taken, '%Y%m%dT%H%M%S')),
+            'endpoint': endpoint,
+            'method': method,
+            'elapsed_ms': float(elapsed_ms),
+        })
+    return profiles
+
+
+def profile_text(path, sort='cumulative'):
+    """The top functions of a saved profile as pstats text"""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats(sort).print_stats(PROFILE_TEXT_LINES)
+    return out.getvalue()
+
+
+def setup_profiler(app):
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 1.0)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config.setdefault('PROFILE_KEEP', 50)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abandon_profile)
+
+    @app.route('/admin/profiles')
+    def admin_profiles():
+        if session.get('role') != 'admin':
+            return redirect(url_for('main.admin_login'))
+
+        profiles = list_profiles(app.config['PROFILE_DIR'])
+        route = request.args.get('route')
+        if route:
+            profiles = [p for p in profiles if p['endpoint'] == route]
+        if request.args.get('sort') == 'slowest':
+            profiles.sort(key=lambda p: p['elapsed_ms'], reverse=True)
+        return render_template('admin_profiles.html', profiles=profiles, route=route)
+
+    # ?format=text shows the top functions instead of downloading the file
+    @app.route('/admin/profiles/<name>')
+    def admin_profile_download(name):
+        if session.get('role') != 'admin':
+            return redirect(url_for('main.admin_login'))
+        if not _FILENAME.match(name):
+            abort(404)
+
+        directory = app.config['PROFILE_DIR']
+        if request.args.get('format') == 'text':
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                abort(404)
+            sort = request.args.get('sort', 'cumulative')
+            if sort not in PROFILE_TEXT_SORTS:
+                sort = 'cumulative'
+            return Response(profile_text(path, sort), mimetype='text/plain')
+        return send_from_directory(directory, name, as_attachment=True)
@@ -0,0 +1,66 @@
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import sqlite
+from models import db, Student, Teacher, Admin, Course, Enrollment, ArchivedEnrollment
+from catalog import catalog_query
+
+# QUERY PLAN CHECKS
+# Runs EXPLAIN QUERY PLAN on the lookups app.py makes on every request and
+# flags any that would scan a whole table or sort its rows in a temporary
+# b-tree instead of reading them in index order. Run with:
+#   flask --app app check-query-plans
+
+
+def _hot_queries():
+    return [
+        ('student login by email', Student.query.filter_by(email='a@b.com')),
+        ('teacher login by email', Teacher.query.filter_by(email='a@b.com')),
+        ('admin login by username', Admin.query.filter_by(username='admin')),
+        ('student by name', Student.query.filter_by(name='Chuck Norris')),
+        ('teacher by name', Teacher.query.filter_by(name='Dr. Hepworth')),
+        ('courses by teacher', Course.query.filter_by(teacher_id=1)),
+        ('catalog page by name',
+         catalog_query().filter(tuple_(Course.name, Course.id) > ('M', 5))
+         .order_by(Course.name, Course.id).limit(50)),
+        ('catalog page by professor',
+         catalog_query().filter(tuple_(Course.teacher_name, Course.id) > ('M', 5))
+         .order_by(Course.teacher_name, Course.id).limit(50)),
+        ('catalog page by enrolled count',
+         catalog_query().filter(tuple_(Course.enrolled_count, Course.id) < (10, 5))
+         .order_by(Course.enrolled_count.desc(), Course.id.desc()).limit(50)),
+        ('seat counts for the term',
+         db.session.query(Course.id, Course.enrolled_count).filter(Course.term == 'default')),
+        ('enrollments by student',
+         Enrollment.query.filter_by(student_id=1).join(Course)),
+        ('enrollments by course',
+         Enrollment.query.filter_by(course_id=1).join(Student)),
+        ('enrollment by student and course',
+         Enrollment.query.filter_by(student_id=1, course_id=1)),
+        ('graded enrollments by student',
+         Enrollment.query.filter_by(student_id=1).filter(Enrollment.grade.isnot(None))),
+        ('archived enrollments by student',
+         ArchivedEnrollment.query.filter_by(student_id=1).join(Course)),
+    ]
+
+
+def explain(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    sql = str(query.statement.compile(
+        dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}
+    ))
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(plan):
+    """The plan lines that scan a whole table or sort in a temporary b-tree"""
+    return [detail for detail in plan if detail.startswith('SCAN ') or 'TEMP B-TREE' in detail]
+
+
+def check_query_plans():
+    """Return (label, plan, ok) for every hot query. ok is False on a full scan or a sort"""
+    results = []
+    for label, query in _hot_queries():
+        plan = explain(query)
+        ok = not plan_problems(plan)
+        results.append((label, plan, ok))
+    return results
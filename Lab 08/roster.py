@@ -0,0 +1,152 @@
+import csv
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from models import db, Student, Teacher, Course
+from catalog import invalidate_catalog
+from sqlite_profile import write_queue
+import passwords
+
+# BULK ROSTER IMPORT
+# Reads a CSV roster a chunk at a time, validates each row, hashes passwords
+# on a pool of processes (hashing is CPU-bound) and inserts each chunk with
+# one executemany (on the writer thread). Only one chunk is held in memory at a time, and results
+# are yielded per chunk so callers can report progress as it goes.
+#
+# The pool's processes are spawned, not forked: the import runs inside a
+# threaded web worker, and a fork copies locks held by its other threads
+# (the writer thread, the password pool) into a child that can never
+# release them.
+#
+# Columns:
+#   students, teachers   name,email,password
+#   courses              name,description,capacity,teacher_email
+
+ROSTER_KINDS = ('students', 'teachers', 'courses')
+CHUNK_SIZE = 1000
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method)
+
+
+def _validate_people(model, rows):
+    """Split (line, row) pairs into valid (line, values) pairs and errors"""
+    emails = [(row.get('email') or '').strip() for _, row in rows]
+    taken = {
+        email for (email,) in
+        db.session.query(model.email).filter(model.email.in_([e for e in emails if e]))
+    }
+
+    valid, errors, seen = [], [], set()
+    for (line, row), email in zip(rows, emails):
+        name = (row.get('name') or '').strip()
+        password = row.get('password') or ''
+        if not name:
+            errors.append({'line': line, 'error': 'Missing name'})
+        elif '@' not in email:
+            errors.append({'line': line, 'error': f"Invalid email '{email}'"})
+        elif not password:
+            errors.append({'line': line, 'error': 'Missing password'})
+        elif email in taken or email in seen:
+            errors.append({'line': line, 'error': f"Email '{email}' already exists"})
+        else:
+            seen.add(email)
+            valid.append((line, {'name': name, 'email': email, 'password': password}))
+    return valid, errors
+
+
+def _validate_courses(rows):
+    teacher_emails = {(row.get('teacher_email') or '').strip() for _, row in rows}
+    teachers = dict(
+        db.session.query(Teacher.email, Teacher.id).filter(Teacher.email.in_(teacher_emails))
+    )
+
+    valid, errors = [], []
+    for line, row in rows:
+        name = (row.get('name') or '').strip()
+        teacher_email = (row.get('teacher_email') or '').strip()
+        try:
+            capacity = int(row.get('capacity') or 30)
+        except ValueError:
+            capacity = 0
+
+        if not name:
+            errors.append({'line': line, 'error': 'Missing name'})
+        elif capacity < 1:
+            errors.append({'line': line, 'error': f"Invalid capacity '{row.get('capacity')}'"})
+        elif teacher_email not in teachers:
+            errors.append({'line': line, 'error': f"Teacher '{teacher_email}' not found"})
+        else:
+            valid.append((line, {
+                'name': name,
+                'description': row.get('description') or '',
+                'capacity': capacity,
+                'teacher_id': teachers[teacher_email],
+            }))
+    return valid, errors
+
+
+def _insert_rows(model, valid):
+    """Insert one chunk, returning (inserted, errors)"""
+    if not valid:
+        return 0, []
+    try:
+        db.session.execute(insert(model), [values for _, values in valid])
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent write took one of the emails after validation
+        db.session.rollback()
+        return 0, [{'line': line, 'error': 'Conflicts with an existing record'} for line, _ in valid]
+    return len(valid), []
+
+
+def import_roster(kind, lines, chunk_size=CHUNK_SIZE, processes=None):
+    """Import a CSV roster, yielding a progress dict after every chunk.
+
+    Each dict has the running 'processed' and 'inserted' totals and that
+    chunk's 'errors'. processes=0 hashes passwords in this process.
+    """
+    if kind not in ROSTER_KINDS:
+        raise ValueError(f"Unknown roster kind '{kind}'")
+
+    model = {'students': Student, 'teachers': Teacher, 'courses': Course}[kind]
+    # Line 1 is the header, so data rows start at line 2
+    rows = enumerate(csv.DictReader(lines), start=2)
+    processes = os.cpu_count() if processes is None else processes
+    pool = None
+    if processes and kind != 'courses':
+        pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+
+    processed = inserted = 0
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            if kind == 'courses':
+                valid, errors = _validate_courses(chunk)
+            else:
+                valid, errors = _validate_people(model, chunk)
+                plain = [values.pop('password') for _, values in valid]
+                method = itertools.repeat(passwords.hash_method())
+                hashed = pool.map(_hash, plain, method, chunksize=32) if pool else map(_hash, plain, method)
+                for (_, values), password_hash in zip(valid, hashed):
+                    values['password_hash'] = password_hash
+
+            count, failed = write_queue.run(_insert_rows, model, valid)
+
+            processed += len(chunk)
+            inserted += count
+            errors += failed
+            yield {'processed': processed, 'inserted': inserted, 'errors': errors}
+    finally:
+        if pool:
+            pool.shutdown()
+        if kind == 'courses' and inserted:
+            invalidate_catalog()
@@ -0,0 +1,97 @@
+from sqlalchemy import inspect, text
+from models import db, DEFAULT_TERM, NO_TEACHER
+from versions import VERSION_TRIGGERS
+from grade_stats import GRADE_STATS_TRIGGERS, rebuild_grade_stats
+from course_search import SEARCH_TRIGGERS, create_search_table, rebuild_search_index, SEARCH_TABLE
+from catalog import TEACHER_NAME_TRIGGERS, rebuild_teacher_names
+
+# SCHEMA UPGRADES
+# The app ships with an existing university.db, so columns added to models.py
+# after it was created are added here in place when the app starts.
+
+
+def _columns(table):
+    return {column['name'] for column in inspect(db.engine).get_columns(table)}
+
+
+def install_triggers(triggers):
+    """Create each {name: (when, body)} trigger the database doesn't have yet"""
+    for name, (when, body) in triggers.items():
+        db.session.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {when} BEGIN {body} END"))
+    db.session.commit()
+
+
+def upgrade_schema():
+    """Create missing tables, columns and indexes in an existing database"""
+    had_grade_stats = inspect(db.engine).has_table('course_grade_stats')
+    had_search_index = inspect(db.engine).has_table(SEARCH_TABLE)
+    db.create_all()
+
+    if 'enrolled_count' not in _columns('courses'):
+        print("Upgrading schema: adding courses.enrolled_count")
+        db.session.execute(text(
+            "ALTER TABLE courses ADD COLUMN enrolled_count INTEGER NOT NULL DEFAULT 0"
+        ))
+        db.session.execute(text(
+            "UPDATE courses SET enrolled_count = "
+            "(SELECT COUNT(*) FROM enrollments WHERE enrollments.course_id = courses.id)"
+        ))
+        db.session.commit()
+
+    if 'term' not in _columns('courses'):
+        print("Upgrading schema: adding courses.term")
+        db.session.execute(text(
+            f"ALTER TABLE courses ADD COLUMN term VARCHAR(20) NOT NULL DEFAULT '{DEFAULT_TERM}'"
+        ))
+        db.session.commit()
+
+    added_teacher_name = 'teacher_name' not in _columns('courses')
+    if added_teacher_name:
+        print("Upgrading schema: adding courses.teacher_name")
+        db.session.execute(text(
+            f"ALTER TABLE courses ADD COLUMN teacher_name VARCHAR(100) NOT NULL DEFAULT '{NO_TEACHER}'"
+        ))
+        db.session.commit()
+
+    if 'enrollment_id' not in _columns('archived_enrollments'):
+        # Archived rows used to keep their enrollment id as their own key
+        print("Upgrading schema: adding archived_enrollments.enrollment_id")
+        db.session.execute(text(
+            "ALTER TABLE archived_enrollments ADD COLUMN enrollment_id INTEGER NOT NULL DEFAULT 0"
+        ))
+        db.session.execute(text("UPDATE archived_enrollments SET enrollment_id = id"))
+        db.session.commit()
+
+    if 'version' not in _columns('enrollments'):
+        print("Upgrading schema: adding enrollments.version")
+        db.session.execute(text(
+            "ALTER TABLE enrollments ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        ))
+        db.session.commit()
+
+    # create_all() only indexes new tables, so add any index declared in
+    # models.py that an older database is missing
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    # Triggers that keep version_stamps current for page ETags
+    install_triggers(VERSION_TRIGGERS)
+
+    # courses.teacher_name: triggers keep it current, a new column needs filling
+    install_triggers(TEACHER_NAME_TRIGGERS)
+    if added_teacher_name:
+        rebuild_teacher_names()
+
+    # Grade statistics: triggers keep them current, a new table needs filling
+    install_triggers(GRADE_STATS_TRIGGERS)
+    if not had_grade_stats:
+        print("Upgrading schema: building course grade statistics")
+        rebuild_grade_stats()
+
+    # Full-text course search: triggers keep it current, a new index needs filling
+    create_search_table()
+    install_triggers(SEARCH_TRIGGERS)
+    if not had_search_index:
+        print("Upgrading schema: building course search index")
+        rebuild_search_index()
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import deque
+from background import BackgroundWorker
+from models import db, Course, current_term
+from versions import read_stamps
+
+# LIVE SEAT UPDATES (Server-Sent Events)
+# Seat counts are published as {course_id, enrolled} into one shared ring
+# buffer. Each open stream only remembers the last event id it sent and waits
+# on a condition variable, so a connection costs no DB session, no
+# per-client queue and no work on publish. Streams end after
+# SEAT_STREAM_MAX_SECONDS and the browser's EventSource reconnects with
+# Last-Event-ID, resuming where it left off. A client that fell further
+# behind than the buffer gets a 'resync' event instead.
+#
+# A threaded server still parks one thread per stream, so streams are
+# capped per process at SEAT_STREAM_MAX_CLIENTS, by default a quarter of
+# WORKER_THREADS: open registration tabs can never take every thread. A
+# page that is turned away (503) polls /api/seats instead. Under a
+# gevent/eventlet worker, where a stream costs no thread, raise the cap to
+# serve thousands of them.
+#
+# Enrollments are made by every worker process, so the counts don't come
+# from the enrollment routes: while any stream is open, one watcher thread
+# per process checks the 'seats' version stamp every SEAT_WATCH_SECONDS
+# and, when it has moved, re-reads the current term's counts (one query on
+# the (term, enrolled_count) index) and publishes those that changed. The
+# values are absolute, so every worker reports the same numbers and a page
+# that missed an event is put right by the next one.
+#
+# Settings (app.config):
+#   SEAT_STREAM_MAX_CLIENTS  open streams per process (default
+#                            WORKER_THREADS // STREAM_THREAD_SHARE)
+#   SEAT_STREAM_MAX_SECONDS  how long a stream lasts before reconnecting
+#   SEAT_WATCH_SECONDS       how often the watcher checks for changes
+
+BUFFER_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+STREAM_THREAD_SHARE = 4  # default cap: one stream per this many server threads
+
+
+class SeatBroadcaster(BackgroundWorker):
+    thread_name = 'seat-watcher'
+
+    def __init__(self, max_clients=1000, max_seconds=300, watch_seconds=1.0):
+        super().__init__()
+        self.app = None
+        self.max_clients = max_clients
+        self.max_seconds = max_seconds
+        self.watch_seconds = watch_seconds
+        self.clients = 0
+        self._events = deque(maxlen=BUFFER_SIZE)  # (id, payload)
+        self._last_id = 0
+        self._changed = threading.Condition()
+        self._stamp = None
+        self._counts = None  # course id -> enrolled, as last read
+
+    def init_app(self, app):
+        app.config.setdefault('SEAT_STREAM_MAX_CLIENTS', app.config['WORKER_THREADS'] // STREAM_THREAD_SHARE)
+        app.config.setdefault('SEAT_STREAM_MAX_SECONDS', self.max_seconds)
+        app.config.setdefault('SEAT_WATCH_SECONDS', self.watch_seconds)
+        self.app = app
+        self.max_clients = app.config['SEAT_STREAM_MAX_CLIENTS']
+        self.max_seconds = app.config['SEAT_STREAM_MAX_SECONDS']
+        self.watch_seconds = app.config['SEAT_WATCH_SECONDS']
+        # Counts read from another database mean nothing here
+        self._stamp = self._counts = None
+
+    def publish(self, course_id, enrolled):
+        with self._changed:
+            self._last_id += 1
+            self._events.append((self._last_id, {'course_id': course_id, 'enrolled': enrolled}))
+            self._changed.notify_all()
+
+    def connect(self):
+        """Reserve a stream slot. Returns False when the server is at its limit"""
+        with self._changed:
+            if self.clients >= self.max_clients:
+                return False
+            self.clients += 1
+            self._changed.notify_all()
+        self._ensure_started()
+        return True
+
+    def disconnect(self):
+        """Give back the slot from connect()"""
+        with self._changed:
+            self.clients -= 1
+
+    def _events_after(self, last_id):
+        """Events newer than last_id, or None if some were already dropped"""
+        if self._events and last_id < self._events[0][0] - 1:
+            return None
+        return [event for event in self._events if event[0] > last_id]
+
+    def stream(self, last_id=None):
+        """Generator of SSE text. Doesn't release the slot from connect(): the
+        generator's own cleanup never runs if it is never started, so the
+        caller calls disconnect() when the response is closed
+        """
+        with self._changed:
+            if last_id is None or last_id > self._last_id:
+                last_id = self._last_id
+        yield f'retry: 3000\nid: {last_id}\n\n'
+
+        deadline = time.monotonic() + self.max_seconds
+        while time.monotonic() < deadline:
+            timeout = min(HEARTBEAT_SECONDS, deadline - time.monotonic())
+            with self._changed:
+                self._changed.wait_for(lambda: self._last_id > last_id, timeout=timeout)
+                events = self._events_after(last_id)
+                newest = self._last_id
+
+            if events is None:
+                last_id = newest
+                yield f'id: {last_id}\nevent: resync\ndata: {{}}\n\n'
+            elif events:
+                chunks = [f'id: {i}\nevent: seats\ndata: {json.dumps(payload)}\n\n' for i, payload in events]
+                last_id = events[-1][0]
+                yield ''.join(chunks)
+            else:
+                yield ': keepalive\n\n'
+
+    def _work(self):
+        while True:
+            # Idle while nobody is listening
+            with self._changed:
+                self._changed.wait_for(lambda: self.clients > 0)
+            try:
+                with self.app.app_context():
+                    self._check_counts()
+            except Exception as e:
+                print(f"Seat watcher failed: {e}")
+            time.sleep(self.watch_seconds)
+
+    def _check_counts(self):
+        """Publish the courses whose count changed since the last read"""
+        stamp = read_stamps('seats')['seats']
+        if stamp == self._stamp:
+            return
+        # Same transaction as the stamp, so the two agree
+        counts = dict(db.session.query(Course.id, Course.enrolled_count).filter(Course.term == current_term()))
+        if self._counts is not None:
+            for course_id, enrolled in counts.items():
+                if self._counts.get(course_id) != enrolled:
+                    self.publish(course_id, enrolled)
+        self._stamp, self._counts = stamp, counts
+
+
+seat_events = SeatBroadcaster()
@@ -0,0 +1,145 @@
+import queue
+import sqlite3
+from concurrent.futures import Future
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db
+from background import BackgroundWorker
+
+# SQLITE CONCURRENCY PROFILE
+# With several workers, SQLite's default rollback journal makes readers wait
+# for writers and concurrent commits fail with "database is locked". The
+# 'production' profile switches to WAL (readers never block behind the
+# writer), relaxes fsyncs to synchronous=NORMAL, waits on locks instead of
+# failing, and sizes the connection pool for many request threads.
+#
+# Commits from the hot write endpoints also go through a single writer thread
+# (WriteQueue below), so they queue up in-process instead of fighting over
+# the SQLite write lock.
+#
+# Settings (app.config):
+#   SQLITE_PROFILE  'production' or 'default' (plain SQLite, writes inline)
+
+# Per-request counters in g (kept by metrics.py) that a queued job adds to,
+# as if it had run on the request's own thread
+JOB_COUNTERS = ('sql_statements', 'db_time')
+
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout_ms': 5000,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 10,
+        'write_queue': True,
+    },
+}
+
+_pragmas = {}
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not _pragmas or not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={_pragmas['journal_mode']}")
+    cursor.execute(f"PRAGMA synchronous={_pragmas['synchronous']}")
+    cursor.execute(f"PRAGMA busy_timeout={_pragmas['busy_timeout_ms']}")
+    cursor.close()
+
+
+def configure_sqlite(app):
+    """Apply the SQLite profile. Call before db.init_app(app)"""
+    global _pragmas
+
+    app.config.setdefault('SQLITE_PROFILE', 'production')
+    profile = SQLITE_PROFILES[app.config['SQLITE_PROFILE']]
+
+    if not profile or not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        _pragmas = {}
+        write_queue.init_app(app, enabled=False)
+        return
+
+    _pragmas = profile
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options.setdefault('pool_size', profile['pool_size'])
+    options.setdefault('max_overflow', profile['max_overflow'])
+    options.setdefault('pool_timeout', profile['pool_timeout'])
+    connect_args = options.setdefault('connect_args', {})
+    # sqlite3's own lock wait, in seconds (matches the busy_timeout pragma)
+    connect_args.setdefault('timeout', profile['busy_timeout_ms'] / 1000)
+
+    write_queue.init_app(app, enabled=profile['write_queue'])
+
+
+class WriteQueue(BackgroundWorker):
+    """Runs write jobs one at a time on a single background thread.
+
+    run(fn, *args) blocks until fn has run (inside an app context, with its
+    own session) and returns its result or raises its exception. When the
+    queue is disabled fn simply runs inline.
+
+    run() ends the caller's transaction before it waits, so the caller's
+    pooled connection goes back to the pool: the writer takes its connection
+    from the same pool, and callers holding theirs while they queue could
+    otherwise use it up and leave the writer waiting for a connection.
+
+    The caller's JOB_COUNTERS are carried over: the job starts them at zero
+    in its own app context and run() adds what it counted to the caller's.
+    """
+
+    thread_name = 'sqlite-writer'
+
+    def __init__(self):
+        super().__init__()
+        self.app = None
+        self.enabled = False
+        self._jobs = queue.Queue()
+
+    def init_app(self, app, enabled=True):
+        self.app = app
+        self.enabled = enabled
+
+    def run(self, fn, *args, **kwargs):
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        db.session.rollback()
+        self._ensure_started()
+        future = Future()
+        counters = dict.fromkeys((name for name in JOB_COUNTERS if name in g), 0)
+        self._jobs.put((future, fn, args, kwargs, counters))
+        try:
+            return future.result()
+        finally:
+            for name, value in counters.items():
+                setattr(g, name, getattr(g, name) + value)
+
+    def _work(self):
+        while True:
+            future, fn, args, kwargs, counters = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self.app.app_context():
+                for name, value in counters.items():
+                    setattr(g, name, value)
+                try:
+                    result, error = fn(*args, **kwargs), None
+                except BaseException as e:
+                    db.session.rollback()
+                    result, error = None, e
+                # Read back before the future resolves, so run() sees them
+                for name in counters:
+                    counters[name] = g.get(name)
+
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+write_queue = WriteQueue()
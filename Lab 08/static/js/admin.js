@@ -37,17 +37,29 @@ document.addEventListener("DOMContentLoaded", () => {
       if (btn.classList.contains("update-grade")) {
         const row = btn.closest("tr");
         const enrollmentId = row.dataset.enrollmentId;
-        const grade = row.querySelector(".grade-input").value.trim();
+        const gradeInput = row.querySelector(".grade-input");
+        const grade = gradeInput.value.trim();
 
+        // Send the version the page was rendered with; a 409 means someone
+        // else changed the grade in the meantime
         fetch(`/api/admin/enrollments/${enrollmentId}`, {
           method: "PUT",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ grade }),
+          body: JSON.stringify({ grade, version: parseInt(row.dataset.version) }),
         })
-          .then((res) => res.json())
-          .then((data) => {
+          .then((res) => res.json().then((data) => ({ status: res.status, data })))
+          .then(({ status, data }) => {
             console.log(data);
-            alert("Grade updated!");
+            if (status === 409) {
+              gradeInput.value = data.grade ?? "";
+              row.dataset.version = data.version;
+              alert(`${data.error}. The grade is now ${data.grade ?? "not set"}; update again to overwrite it.`);
+            } else if (data.success) {
+              row.dataset.version = data.version;
+              alert("Grade updated!");
+            } else {
+              alert(data.error);
+            }
           })
           .catch((err) => console.error(err));
       }
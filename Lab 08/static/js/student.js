@@ -46,20 +46,244 @@ async function loadStudentDashboard() {
 }
 
 // Class Registration
+const SEARCH_DELAY_MS = 250;
+let searchController = null;
+let nextCursor = null;
+
 function loadClassRegistration() {
   const table = document.querySelector('#classCatalog tbody');
-  const msg = document.getElementById('classListMsg');
+  const search = document.getElementById('courseSearch');
   
   if (table) {
-    console.log('Class registration page loaded with template data');
-    
-    const joinButtons = document.querySelectorAll('.join-btn');
-    joinButtons.forEach(button => {
-      button.addEventListener('click', function() {
-        const courseId = this.getAttribute('data-course-id');
-        joinClass(parseInt(courseId));
-      });
+    // Event delegation so rows added by searches and seat updates still work
+    table.addEventListener('click', (e) => {
+      const button = e.target.closest('.join-btn');
+      if (button) joinClass(parseInt(button.getAttribute('data-course-id')));
+    });
+
+    document.getElementById('registerSelectedBtn')?.addEventListener('click', registerSelected);
+    document.getElementById('loadMoreBtn')?.addEventListener('click', () => {
+      searchCourses(search ? search.value : '', nextCursor);
+    });
+
+    // Search as the student types, once they pause
+    let timer = null;
+    search?.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => searchCourses(search.value), SEARCH_DELAY_MS);
+    });
+
+    searchCourses('');
+    subscribeSeatUpdates();
+  }
+}
+
+// Load a page of courses matching text (every course when it's empty).
+// after is the previous page's 'next' cursor, to append the following page
+async function searchCourses(text, after = null) {
+  const table = document.querySelector('#classCatalog tbody');
+
+  // A newer search makes any request still in flight pointless
+  searchController?.abort();
+  searchController = new AbortController();
+
+  const params = new URLSearchParams({ q: text.trim() });
+  if (after) params.set('after', after);
+
+  try {
+    const response = await fetch(`/api/courses/search?${params}`, { signal: searchController.signal });
+    const data = await response.json();
+    if (!response.ok) {
+      console.error('Course search failed:', data.error);
+      return;
+    }
+
+    if (!after) table.innerHTML = '';
+    data.courses.forEach(course => table.appendChild(renderCourseRow(course)));
+
+    nextCursor = data.next;
+    document.getElementById('loadMoreBtn')?.classList.toggle('d-none', !nextCursor);
+    document.getElementById('noCourses')?.classList.toggle('d-none', table.rows.length > 0);
+  } catch (err) {
+    if (err.name !== 'AbortError') console.error('Error searching courses:', err);
+  }
+}
+
+// Build a catalog row. Course text goes in through textContent, not innerHTML
+function renderCourseRow(course) {
+  const row = document.createElement('tr');
+  row.dataset.courseId = course.id;
+  row.dataset.enrolled = course.enrolled;
+  row.dataset.capacity = course.capacity;
+  if (course.joined) row.dataset.joined = 'true';
+
+  row.innerHTML = `
+    <td><input type="checkbox" class="form-check-input cart-select" value="${course.id}"></td>
+    <td></td>
+    <td></td>
+    <td><span class="enrolled-count"></span> / ${course.capacity}</td>
+    <td class="seat-action"></td>`;
+  row.cells[1].textContent = course.name;
+  row.cells[1].title = course.description || '';
+  row.cells[2].textContent = course.professor;
+  row.querySelector('.enrolled-count').textContent = course.enrolled;
+
+  renderSeatAction(row);
+  return row;
+}
+
+// Register for every checked class in one request
+async function registerSelected() {
+  const courseIds = Array.from(document.querySelectorAll('.cart-select:checked'))
+    .map(box => parseInt(box.value));
+
+  if (!courseIds.length) {
+    alert('Select at least one class first.');
+    return;
+  }
+
+  try {
+    const response = await fetch('/api/student/register/batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ courseIds: courseIds })
+    });
+
+    const data = await response.json();
+    if (!response.ok) {
+      alert(`${data.error || 'Failed to register.'}`);
+      return;
+    }
+
+    // Surge mode: some courses were queued, wait for their outcome
+    if (response.status === 202) {
+      const ticket = await waitForTicket(data.statusUrl);
+      data.results = data.results.filter(result => result.status !== 'queued').concat(ticket.results);
+      data.enrolled = ticket.enrolled;
+    }
+
+    const messages = {
+      enrolled: 'enrolled',
+      full: 'class is full',
+      duplicate: 'already enrolled',
+      not_found: 'class not found'
+    };
+    const lines = data.results.map(result => {
+      const row = document.querySelector(`#classCatalog tr[data-course-id="${result.courseId}"]`);
+      if (row && (result.status === 'enrolled' || result.status === 'duplicate')) {
+        row.dataset.joined = 'true';
+        renderSeatAction(row);
+      }
+      const name = row ? row.cells[1].textContent : `Class ${result.courseId}`;
+      return `${name}: ${messages[result.status] || result.status}`;
     });
+
+    alert(`Enrolled in ${data.enrolled} of ${data.results.length} classes.\n\n${lines.join('\n')}`);
+  } catch (err) {
+    console.error('Error registering for classes:', err);
+    alert('Error registering for classes. Please try again.');
+  }
+}
+
+// In surge mode registrations are queued and answered with a ticket. Poll its
+// status URL, backing off, until every course in it has an outcome
+const REGISTRATION_ERRORS = {
+  full: 'Course is full',
+  duplicate: 'Already enrolled in this course',
+  not_found: 'Course not found'
+};
+
+async function waitForTicket(statusUrl) {
+  let delay = 250;
+  for (;;) {
+    await new Promise(resolve => setTimeout(resolve, delay));
+    const response = await fetch(statusUrl);
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error);
+    if (data.done) return data;
+    delay = Math.min(delay * 2, 2000);
+  }
+}
+
+// Live seat counts - the server pushes {course_id, enrolled} as students join/leave
+function subscribeSeatUpdates() {
+  if (!window.EventSource) {
+    pollSeatCounts();
+    return;
+  }
+
+  const source = new EventSource('/api/seats/stream');
+
+  source.addEventListener('seats', (e) => {
+    const update = JSON.parse(e.data);
+    const row = document.querySelector(`#classCatalog tr[data-course-id="${update.course_id}"]`);
+    if (row && update.enrolled !== parseInt(row.dataset.enrolled)) setEnrolled(row, update.enrolled);
+  });
+
+  // We missed some updates - fetch the current counts
+  source.addEventListener('resync', () => refreshSeatCounts());
+
+  // The server only keeps a few streams open per process and turns the rest
+  // away (the browser then gives up on the stream) - poll instead
+  source.addEventListener('error', () => {
+    if (source.readyState === EventSource.CLOSED) pollSeatCounts();
+  });
+}
+
+const SEAT_POLL_MS = 15000;
+const SEAT_POLL_BATCH = 200;
+
+// Refresh the seat counts of the listed courses every SEAT_POLL_MS
+function pollSeatCounts() {
+  setInterval(() => {
+    if (!document.hidden) refreshSeatCounts();
+  }, SEAT_POLL_MS);
+}
+
+// Fetch the current seat counts of the listed courses
+async function refreshSeatCounts() {
+  const rows = Array.from(document.querySelectorAll('#classCatalog tr[data-course-id]'));
+
+  for (let start = 0; start < rows.length; start += SEAT_POLL_BATCH) {
+    const batch = rows.slice(start, start + SEAT_POLL_BATCH);
+    const ids = batch.map(row => row.dataset.courseId).join(',');
+    try {
+      const response = await fetch(`/api/seats?ids=${ids}`);
+      if (!response.ok) return;
+      const data = await response.json();
+      batch.forEach(row => {
+        const enrolled = data.seats[row.dataset.courseId];
+        if (enrolled !== undefined && enrolled !== parseInt(row.dataset.enrolled)) setEnrolled(row, enrolled);
+      });
+    } catch (err) {
+      console.error('Error fetching seat counts:', err);
+      return;
+    }
+  }
+}
+
+function setEnrolled(row, enrolled) {
+  row.dataset.enrolled = enrolled;
+  row.querySelector('.enrolled-count').textContent = enrolled;
+  renderSeatAction(row);
+}
+
+// Show Join, Full or Enrolled for a catalog row
+function renderSeatAction(row) {
+  const cell = row.querySelector('.seat-action');
+  const box = row.querySelector('.cart-select');
+  if (box) {
+    box.disabled = Boolean(row.dataset.joined) ||
+      parseInt(row.dataset.enrolled) >= parseInt(row.dataset.capacity);
+    if (box.disabled) box.checked = false;
+  }
+
+  if (row.dataset.joined) {
+    cell.innerHTML = '<button class="btn btn-success btn-sm" disabled>Enrolled</button>';
+  } else if (parseInt(row.dataset.enrolled) >= parseInt(row.dataset.capacity)) {
+    cell.innerHTML = '<button class="btn btn-secondary btn-sm" disabled>Full</button>';
+  } else {
+    cell.innerHTML = `<button class="btn btn-primary btn-sm join-btn" data-course-id="${row.dataset.courseId}">Join</button>`;
   }
 }
 
@@ -75,10 +299,25 @@ async function joinClass(courseId) {
     });
 
     const data = await response.json();
+
+    // Surge mode: the registration was queued, wait for its outcome
+    if (response.status === 202) {
+      const ticket = await waitForTicket(data.statusUrl);
+      const status = ticket.results[0].status;
+      if (status !== 'enrolled') {
+        alert(REGISTRATION_ERRORS[status] || 'Failed to enroll in class.');
+        return;
+      }
+    }
     
     if (response.ok) {
+      // The seat count itself arrives through the seat stream
+      const row = document.querySelector(`#classCatalog tr[data-course-id="${courseId}"]`);
+      if (row) {
+        row.dataset.joined = 'true';
+        renderSeatAction(row);
+      }
       alert('Successfully enrolled in class!');
-      window.location.reload();
     } else {
       alert(`${data.error || 'Failed to enroll in class.'}`);
     }
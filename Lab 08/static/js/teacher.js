@@ -2,7 +2,16 @@ function logoutTeacher() {
   window.location.href = '/logout';
 }
 
-// Enters grade and saves, then requests backend to update (flask API)
+// Someone else changed this grade since the page loaded: show their value
+// and take their version, so saving again deliberately overwrites it
+function showCurrentGrade(input, grade, version) {
+  input.value = grade ?? '';
+  input.defaultValue = input.value;
+  input.dataset.version = version;
+}
+
+// Enters grade and saves, then requests backend to update (flask API).
+// Sends the version the page was rendered with so a concurrent edit isn't lost
 async function updateGrade(courseId, studentId) {
   const gradeInput = document.getElementById(`grade-${studentId}`);
   const grade = gradeInput.value;
@@ -11,12 +20,17 @@ async function updateGrade(courseId, studentId) {
     const response = await fetch(`/api/course/${courseId}/student/${studentId}/grade`, {
       method: 'PUT',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ grade: parseFloat(grade) })
+      body: JSON.stringify({ grade: parseFloat(grade), version: parseInt(gradeInput.dataset.version) })
     });
 
     const data = await response.json();
     if (response.ok) {
+      gradeInput.dataset.version = data.version;
+      gradeInput.defaultValue = grade;
       alert('Grade updated successfully!');
+    } else if (response.status === 409) {
+      showCurrentGrade(gradeInput, data.grade, data.version);
+      alert(`${data.error}. The grade is now ${data.grade ?? 'not set'}; save again to overwrite it.`);
     } else {
       alert(`${data.error}`);
     }
@@ -26,5 +40,59 @@ async function updateGrade(courseId, studentId) {
   }
 }
 
+// Saves every grade edited on the page in one request (bulk gradebook API).
+// Unchanged rows aren't sent: rewriting them would bump their versions and
+// make other teachers' saves of those rows fail for nothing
+async function saveAllGrades(courseId) {
+  const changed = Array.from(document.querySelectorAll('.grade-input'))
+    .filter(input => input.value !== input.defaultValue);
+  if (!changed.length) {
+    alert('No grades have changed.');
+    return;
+  }
+
+  const grades = changed.map(input => ({
+    studentId: parseInt(input.dataset.studentId),
+    grade: input.value === '' ? null : parseFloat(input.value),
+    version: parseInt(input.dataset.version)
+  }));
+
+  try {
+    const response = await fetch(`/api/course/${courseId}/grades`, {
+      method: 'PUT',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(grades)
+    });
+
+    const data = await response.json();
+    if (!response.ok) {
+      alert(`${data.error}`);
+      return;
+    }
+
+    for (const [studentId, version] of Object.entries(data.versions)) {
+      const input = document.getElementById(`grade-${studentId}`);
+      input.dataset.version = version;
+      input.defaultValue = input.value;
+    }
+    for (const error of data.errors) {
+      if (error.version !== undefined) {
+        showCurrentGrade(document.getElementById(`grade-${error.student_id}`), error.grade, error.version);
+      }
+    }
+
+    if (data.errors.length) {
+      const problems = data.errors.map(e => `Student ${e.student_id}: ${e.error}`).join('\n');
+      alert(`${data.message}, but some rows failed:\n${problems}`);
+    } else {
+      alert('All grades saved successfully!');
+    }
+  } catch (err) {
+    console.error(err);
+    alert('Error saving grades');
+  }
+}
+
 window.updateGrade = updateGrade;
+window.saveAllGrades = saveAllGrades;
 window.logoutTeacher = logoutTeacher;
\ No newline at end of file
@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+import uuid
+from enrollments import admit_queued
+from sqlite_profile import write_queue
+from background import BackgroundWorker
+
+# REGISTRATION SURGE MODE
+# When registration opens every student registers at the same moment, and
+# admitting each one in its own transaction leaves request workers waiting on
+# the SQLite write lock. In surge mode the register endpoints only do cheap
+# checks, put the request on a bounded in-process queue and answer 202 with
+# a ticket. One background thread drains the queue, admitting up to
+# SURGE_BATCH_SIZE requests per transaction (through the write queue), and
+# records each outcome against its ticket for the status endpoint to report.
+# A full queue turns requests away with 503 rather than letting the backlog
+# grow without bound.
+#
+# Tickets live in the process that issued them, so with several workers the
+# status poll has to reach the same one (sticky sessions).
+#
+# Settings (app.config):
+#   REGISTRATION_SURGE_MODE  queue registrations instead of admitting inline
+#   SURGE_QUEUE_LIMIT        requests allowed to wait in the queue
+#   SURGE_BATCH_SIZE         requests admitted per transaction
+#   SURGE_RESULT_SECONDS     how long finished tickets can still be looked up
+
+
+class SurgeQueueFull(Exception):
+    """Raised when the admission queue has no room for another request"""
+
+
+class RegistrationQueue(BackgroundWorker):
+    thread_name = 'registration-surge'
+
+    def __init__(self):
+        super().__init__()
+        self.app = None
+        self.enabled = False
+        self.batch_size = 200
+        self.result_seconds = 300
+        self.admitted = 0
+        self.batches = 0
+        self._requests = queue.Queue()
+        self._tickets = {}  # ticket id -> {'student_id', 'results', 'done', 'finished'}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['REGISTRATION_SURGE_MODE']
+        self.batch_size = app.config['SURGE_BATCH_SIZE']
+        self.result_seconds = app.config['SURGE_RESULT_SECONDS']
+        self._requests = queue.Queue(maxsize=app.config['SURGE_QUEUE_LIMIT'])
+        # A worker from an earlier init_app() is left waiting on the old queue
+        self._thread = None
+
+    def submit(self, student_id, course_ids):
+        """Queue a student's registration for course_ids and return its ticket id.
+
+        Raises SurgeQueueFull if there's no room for all of them.
+        """
+        ticket = uuid.uuid4().hex
+        with self._lock:
+            # Checked and filled under the lock, so a ticket is queued whole or not at all
+            if self._requests.maxsize - self._requests.qsize() < len(course_ids):
+                raise SurgeQueueFull()
+            self._prune()
+            self._tickets[ticket] = {
+                'student_id': student_id,
+                'results': {course_id: 'queued' for course_id in course_ids},
+                'done': False,
+                'finished': None,
+            }
+            for course_id in course_ids:
+                self._requests.put_nowait((ticket, student_id, course_id))
+
+        self._ensure_started()
+        return ticket
+
+    def status(self, ticket, student_id):
+        """The ticket's {'done', 'results'}, or None if it isn't this student's"""
+        with self._lock:
+            entry = self._tickets.get(ticket)
+            if entry is None or entry['student_id'] != student_id:
+                return None
+            return {'done': entry['done'], 'results': dict(entry['results'])}
+
+    def depth(self):
+        return self._requests.qsize()
+
+    def join(self):
+        """Wait until every queued registration has an outcome"""
+        self._requests.join()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.result_seconds
+        expired = [ticket for ticket, entry in self._tickets.items()
+                   if entry['finished'] is not None and entry['finished'] < cutoff]
+        for ticket in expired:
+            del self._tickets[ticket]
+
+    def _next_batch(self):
+        batch = [self._requests.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    statuses = write_queue.run(admit_queued, [(student_id, course_id) for _, student_id, course_id in batch])
+            except Exception as e:
+                print(f"Registration batch of {len(batch)} failed: {e}")
+                statuses = ['error'] * len(batch)
+
+            now = time.monotonic()
+            with self._lock:
+                self.batches += 1
+                self.admitted += statuses.count('enrolled')
+                for (ticket, _, course_id), status in zip(batch, statuses):
+                    entry = self._tickets.get(ticket)
+                    if entry is None:
+                        continue
+                    entry['results'][course_id] = status
+                    if 'queued' not in entry['results'].values():
+                        entry['done'] = True
+                        entry['finished'] = now
+
+            for _ in batch:
+                self._requests.task_done()
+
+
+registration_queue = RegistrationQueue()
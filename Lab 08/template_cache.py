@@ -0,0 +1,91 @@
+import os
+import threading
+from collections import OrderedDict
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+# TEMPLATE CACHING
+# Compiled templates are kept in a bytecode cache on disk that every worker
+# shares: the first process to compile a template writes it out and the rest
+# (and later restarts) load it instead of compiling again. Entries are keyed
+# by the template's source, so an edited template is simply compiled anew.
+#
+# Large tables cache their rendered HTML in fragments. A template wraps the
+# part to cache in a call block with a name, a key and a version:
+#
+#   {% call cache_fragment('roster', course.id, roster_version) %} ... {% endcall %}
+#
+# The block is only rendered when the version differs from the one cached
+# for that name and key, so one slot per key holds the newest copy. Course
+# rosters use their 'roster:<id>' version stamp (see versions.py) and load
+# the enrollments inside the block, skipping the query on a hit. Catalog
+# rows use the values they show, which the catalog cache already has, so a
+# row whose seat count changed is re-rendered and the rest of the page comes
+# from cache. Fragments live in each worker's memory.
+#
+# Settings (app.config):
+#   JINJA_BYTECODE_CACHE_DIR  shared bytecode directory (default
+#                             instance/jinja_cache, empty to disable)
+#   FRAGMENT_CACHE_SIZE       fragments kept per worker (0 disables)
+
+
+class FragmentCache:
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (name, key) -> (version, html)
+        self._lock = threading.Lock()
+
+    def get(self, name, key, version, render):
+        """The cached HTML for (name, key) at version, calling render() on a miss"""
+        if not self.max_entries:
+            return render()
+
+        with self._lock:
+            cached = self._entries.get((name, key))
+            if cached and cached[0] == version:
+                self._entries.move_to_end((name, key))
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        html = Markup(render())
+
+        with self._lock:
+            self._entries[(name, key)] = (version, html)
+            self._entries.move_to_end((name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+fragment_cache = FragmentCache()
+
+
+def cache_fragment(name, key, version, caller):
+    """Template global for {% call %} blocks: the block's HTML, cached by version"""
+    return fragment_cache.get(name, key, version, caller)
+
+
+def setup_template_cache(app):
+    app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+    app.config.setdefault('FRAGMENT_CACHE_SIZE', fragment_cache.max_entries)
+
+    directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+    # Versions are only meaningful within one database
+    fragment_cache.max_entries = app.config['FRAGMENT_CACHE_SIZE']
+    fragment_cache.clear()
+    app.jinja_env.globals['cache_fragment'] = cache_fragment
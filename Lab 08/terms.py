@@ -0,0 +1,68 @@
+from sqlalchemy import delete, insert, literal, select, union_all
+from models import db, Course, Enrollment, ArchivedEnrollment, current_term
+from sqlite_profile import write_queue
+
+# TERM ROLLOVER
+# Every course belongs to a term. Closing a term moves its enrollments from
+# the live enrollments table into archived_enrollments, a batch per
+# transaction, so dashboards, seat counts and the grades API only ever touch
+# the current term's rows. Transcripts read both tables. Run with:
+#   flask --app app rollover-term <term>
+#
+# The archived courses stay in the courses table (transcripts need their
+# names) but drop out of listings, which only show CURRENT_TERM. Their grade
+# statistics empty out as the enrollments leave.
+
+ROLLOVER_BATCH_SIZE = 1000
+
+
+def _archive_batch(term, batch_size):
+    """Move up to batch_size of term's enrollments, returning how many moved"""
+    term_courses = select(Course.id).where(Course.term == term)
+    ids = [id for (id,) in db.session.execute(
+        select(Enrollment.id).where(Enrollment.course_id.in_(term_courses)).limit(batch_size)
+    )]
+    if not ids:
+        return 0
+
+    db.session.execute(insert(ArchivedEnrollment).from_select(
+        ['enrollment_id', 'student_id', 'course_id', 'term', 'grade'],
+        select(Enrollment.id, Enrollment.student_id, Enrollment.course_id, literal(term), Enrollment.grade)
+        .where(Enrollment.id.in_(ids))
+    ))
+    db.session.execute(delete(Enrollment).where(Enrollment.id.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+
+def rollover_term(term, batch_size=ROLLOVER_BATCH_SIZE):
+    """Archive every enrollment in a closed term, yielding the running total
+    after each batch. Raises ValueError for the current term.
+    """
+    if term == current_term():
+        raise ValueError(f"'{term}' is the current term - set CURRENT_TERM to the new term first")
+
+    archived = 0
+    while True:
+        # Each batch is its own short write, so registrations aren't held up
+        moved = write_queue.run(_archive_batch, term, batch_size)
+        if not moved:
+            break
+        archived += moved
+        yield archived
+
+
+def transcript(student_id):
+    """Every course a student has taken, live and archived, ordered by term"""
+    live = (
+        select(Course.term, Course.name, Enrollment.grade)
+        .join(Course, Enrollment.course_id == Course.id)
+        .where(Enrollment.student_id == student_id)
+    )
+    archived = (
+        select(ArchivedEnrollment.term, Course.name, ArchivedEnrollment.grade)
+        .join(Course, ArchivedEnrollment.course_id == Course.id)
+        .where(ArchivedEnrollment.student_id == student_id)
+    )
+    rows = db.session.execute(union_all(live, archived).order_by('term', 'name'))
+    return [{'term': term, 'course': name, 'grade': grade} for term, name, grade in rows]
@@ -0,0 +1,70 @@
+import itertools
+import os
+import sqlite3
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from benchmarks import loadgen
+from catalog import invalidate_catalog
+from models import db, Enrollment
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a fresh database in tmp_path, filled by loadgen"""
+    databases = itertools.count()
+
+    def make(students=50, teachers=5, courses=20, enrollments=200, **config):
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / f'test{next(databases)}.db'}",
+            'ADMIN_PANEL': 'off',
+            'ASSETS_FINGERPRINT': False,
+            'JINJA_BYTECODE_CACHE_DIR': '',
+            'PROFILE_DIR': str(tmp_path / 'profiles'),
+        }
+        settings.update(config)
+        app = create_app(settings)
+        with app.app_context():
+            loadgen.generate(students, teachers, courses, enrollments)
+        # The catalog cache is per process and outlives the previous test's database
+        invalidate_catalog()
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client_as():
+    """A test client logged in as the given role and user id"""
+    def login(app, role, user_id):
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s['user_id'] = user_id
+            s['user_name'] = f'Test {role}'
+            s['role'] = role
+        return client
+    return login
+
+
+@pytest.fixture
+def enroll_from_another_worker():
+    """Enroll a new student the way another process would: this one's caches never hear of it"""
+    def enroll(app, course_id):
+        with app.app_context():
+            path = db.engine.url.database
+            student_id = db.session.query(db.func.max(Enrollment.student_id)).scalar() + 1
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "INSERT INTO students (id, name, email, password_hash) VALUES (?, 'New Student', ?, 'x')",
+                (student_id, f'new{student_id}@example.edu')
+            )
+            conn.execute("INSERT INTO enrollments (student_id, course_id) VALUES (?, ?)", (student_id, course_id))
+            conn.execute("UPDATE courses SET enrolled_count = enrolled_count + 1 WHERE id = ?", (course_id,))
+    return enroll
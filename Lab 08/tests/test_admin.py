@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from models import db
+
+
+@contextmanager
+def capture_queries(app):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def _filter_arg(app, endpoint, column, operation):
+    view = next(v for v in app.extensions['admin'][0]._views if v.endpoint == endpoint)
+    for key, (_, flt) in view._filter_args.items():
+        if flt.column.key == column and str(flt.operation()) == operation:
+            return f'flt0_{key}'
+    raise LookupError(f'No {operation} filter on {column}')
+
+
+def _plans(app, statements):
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        try:
+            return [
+                ' / '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall())
+                for sql, params in statements if sql.lstrip().upper().startswith('SELECT')
+            ]
+        finally:
+            conn.close()
+
+
+def test_people_lists_filter_through_indexes(make_app, client_as):
+    app = make_app(ADMIN_PANEL='eager')
+    client = client_as(app, 'admin', 1)
+
+    for endpoint, column, operation, value in (
+        ('student_admin', 'email', 'equals', 'student7@example.edu'),
+        ('student_admin', 'name', 'starts with', 'Alex'),
+        ('teacher_admin', 'name', 'starts with', 'Sam'),
+        ('course', 'name', 'starts with', 'Intro'),
+    ):
+        arg = _filter_arg(app, endpoint, column, operation)
+        with capture_queries(app) as statements:
+            response = client.get(f'/admin/{endpoint}/?{arg}={value}')
+        assert response.status_code == 200
+
+        plans = _plans(app, statements)
+        assert plans
+        for plan in plans:
+            assert 'SCAN students' not in plan and 'SCAN teachers' not in plan and 'SCAN courses' not in plan, (endpoint, plan)
+
+
+def test_starts_with_filter_matches_prefix(make_app, client_as):
+    app = make_app(ADMIN_PANEL='eager')
+    client = client_as(app, 'admin', 1)
+    arg = _filter_arg(app, 'student_admin', 'email', 'starts with')
+
+    page = client.get(f'/admin/student_admin/?{arg}=student4').get_data(as_text=True)
+
+    assert 'student4@example.edu' in page
+    assert 'student40@example.edu' in page
+    assert 'student5@example.edu' not in page
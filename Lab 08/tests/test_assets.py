@@ -0,0 +1,21 @@
+import assets
+
+
+def test_startup_never_writes_assets(make_app, monkeypatch):
+    def build(static_folder):
+        raise AssertionError('static/dist written at startup')
+
+    monkeypatch.setattr(assets, '_stale', lambda static_folder: True)
+    monkeypatch.setattr(assets, 'build_assets', build)
+
+    make_app(ASSETS_FINGERPRINT=True)
+
+
+def test_plain_files_until_assets_are_built(make_app, tmp_path):
+    app = make_app(ASSETS_FINGERPRINT=True)
+    assets.load_manifest(str(tmp_path))  # a static folder with no manifest
+
+    page = app.test_client().get('/student/login').get_data(as_text=True)
+
+    assert '/static/' in page
+    assert '/assets/' not in page
@@ -0,0 +1,63 @@
+from sqlalchemy import event
+from catalog import invalidate_catalog, load_catalog_page, patch_seat_count
+from models import db, Course
+
+# Every list page costs the same number of queries whatever the catalog size
+SMALL, LARGE = 20, 400
+
+
+def _queries_per_page(make_app, client_as, courses):
+    app = make_app(courses=courses, teachers=2, enrollments=courses * 5)
+    with app.app_context():
+        engine = db.engine
+    pages = {
+        'registration search': (client_as(app, 'student', 1), '/api/courses/search?q=&limit=200'),
+        'teacher dashboard': (client_as(app, 'teacher', 1), '/teacher/dashboard'),
+        'admin course api': (client_as(app, 'admin', 1), '/api/admin/courses?limit=200'),
+        'admin dashboard': (client_as(app, 'admin', 1), '/admin/dashboard?limit=200'),
+    }
+
+    counts = {}
+    for label, (client, url) in pages.items():
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        invalidate_catalog()  # count the cold page, not a cache hit
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            assert client.get(url).status_code == 200, url
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        counts[label] = len(statements)
+    return counts
+
+
+def test_list_pages_run_constant_queries(make_app, client_as):
+    small = _queries_per_page(make_app, client_as, SMALL)
+    large = _queries_per_page(make_app, client_as, LARGE)
+
+    assert large == small, (small, large)
+    assert all(count <= 2 for count in large.values()), large
+
+
+def _walk_pages(sort, limit):
+    ids, cursor = [], None
+    while True:
+        entries, cursor = load_catalog_page(sort, 'asc', cursor, limit)
+        ids += [entry['id'] for entry in entries]
+        if cursor is None:
+            return ids
+
+
+def test_seat_sorted_pages_follow_enrollments(app):
+    with app.app_context():
+        entries, _ = load_catalog_page('enrolled', 'asc', None, 5)
+        # An enrollment rush moves the first course to the end of the order
+        course = db.session.get(Course, entries[0]['id'])
+        course.enrolled_count += 100
+        db.session.commit()
+        patch_seat_count(course.id, 100)
+
+        ids = _walk_pages('enrolled', 5)
+
+        assert sorted(ids) == sorted(id for (id,) in db.session.query(Course.id))
+        assert ids[-1] == course.id
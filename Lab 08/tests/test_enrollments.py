@@ -0,0 +1,82 @@
+import threading
+from models import db, Course, Enrollment, Student
+from enrollments import admit_student
+
+CAPACITY = 5
+STUDENTS = 40
+
+
+def _setup(app):
+    """Course 1 gets CAPACITY seats and STUDENTS students who aren't enrolled anywhere"""
+    with app.app_context():
+        Enrollment.query.delete()
+        db.session.query(Course).update({'enrolled_count': 0})
+        db.session.get(Course, 1).capacity = CAPACITY
+        students = [
+            Student(name=f'Stress Student {i}', email=f'stress{i}@example.edu', password_hash='x')
+            for i in range(STUDENTS)
+        ]
+        db.session.add_all(students)
+        db.session.commit()
+        return [(student.id, student.name) for student in students]
+
+
+def _run_all(jobs):
+    barrier = threading.Barrier(len(jobs))
+    results = [None] * len(jobs)
+
+    def run(i):
+        barrier.wait()
+        results[i] = jobs[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(jobs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def _assert_not_overfilled(app):
+    with app.app_context():
+        course = db.session.get(Course, 1)
+        enrolled = Enrollment.query.filter_by(course_id=1).count()
+        assert enrolled == CAPACITY
+        assert course.enrolled_count == enrolled
+
+
+def test_concurrent_admissions_never_overfill(make_app):
+    # Every thread claims seats in its own transaction, racing in SQLite itself
+    app = make_app(enrollments=0)
+    students = _setup(app)
+
+    def admit(student_id):
+        with app.app_context():
+            return admit_student(student_id, 1)
+
+    statuses = _run_all([lambda student_id=student_id: admit(student_id) for student_id, _ in students])
+
+    assert statuses.count('enrolled') == CAPACITY
+    assert statuses.count('full') == STUDENTS - CAPACITY
+    _assert_not_overfilled(app)
+
+
+def test_concurrent_requests_never_overfill(make_app, client_as):
+    # Registrations and the grades API's enroll-on-first-grade path, mixed
+    app = make_app(enrollments=0)
+    students = _setup(app)
+
+    def request(i, student_id, name):
+        if i % 2:
+            client = client_as(app, 'student', student_id)
+            return client.post('/api/student/register', json={'courseId': 1}).status_code
+        return app.test_client().post('/api/grades', json={'name': name, 'grade': 90}).status_code
+
+    codes = _run_all([
+        lambda i=i, student_id=student_id, name=name: request(i, student_id, name)
+        for i, (student_id, name) in enumerate(students)
+    ])
+
+    assert codes.count(200) == CAPACITY
+    assert codes.count(400) == STUDENTS - CAPACITY
+    _assert_not_overfilled(app)
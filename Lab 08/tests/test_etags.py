@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from catalog import catalog_cache
+from models import db, Course
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def _teacher_of(app, course_id):
+    with app.app_context():
+        return db.session.get(Course, course_id).teacher_id
+
+
+def test_unchanged_revisit_runs_one_query(app, client_as):
+    pages = [
+        (client_as(app, 'teacher', _teacher_of(app, 1)), '/teacher/dashboard'),
+        (client_as(app, 'student', 1), '/student/dashboard'),
+        (client_as(app, 'admin', 1), '/api/admin/courses'),
+    ]
+    for client, url in pages:
+        etag = client.get(url).headers['ETag']
+
+        with count_queries(app) as statements:
+            response = client.get(url, headers={'If-None-Match': etag})
+
+        assert response.status_code == 304, url
+        assert len(statements) <= 1, (url, statements)
+
+
+def test_admin_courses_etag_follows_other_workers_writes(app, client_as, enroll_from_another_worker):
+    client = client_as(app, 'admin', 1)
+    first = client.get('/api/admin/courses?limit=200')
+    before = {c['id']: c for c in first.json}[1]
+
+    enroll_from_another_worker(app, 1)
+
+    response = client.get('/api/admin/courses?limit=200', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    course = {c['id']: c for c in response.json}[1]
+    assert course['students'] == before['students'] + 1
+
+    again = client.get('/api/admin/courses?limit=200', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_teacher_dashboard_etag_follows_other_workers_writes(app, client_as, enroll_from_another_worker):
+    client = client_as(app, 'teacher', _teacher_of(app, 1))
+    first = client.get('/teacher/dashboard')
+    with app.app_context():
+        course = db.session.get(Course, 1)
+        name, count = course.name, course.enrolled_count
+    row = '<td>{}</td>\n            <td>{}</td>\n            <td>{}</td>'
+
+    enroll_from_another_worker(app, 1)
+
+    response = client.get('/teacher/dashboard', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    page = response.get_data(as_text=True).replace('\r\n', '\n')
+    teacher_name = 'Test teacher'
+    assert row.format(name, teacher_name, count + 1) in page
+
+
+def test_seat_changes_keep_the_catalog_cache(app, client_as, enroll_from_another_worker):
+    client = client_as(app, 'admin', 1)
+    first = client.get('/api/admin/courses?limit=200')
+    version = catalog_cache.version
+
+    enroll_from_another_worker(app, 1)
+    with count_queries(app) as statements:
+        response = client.get('/api/admin/courses?limit=200', headers={'If-None-Match': first.headers['ETag']})
+
+    assert catalog_cache.version == version
+    # The stamps, then the cached courses' seat counts: no catalog query
+    assert len(statements) == 2, statements
+    before = {c['id']: c['students'] for c in first.json}
+    after = {c['id']: c['students'] for c in response.json}
+    assert after == {**before, 1: before[1] + 1}
@@ -0,0 +1,75 @@
+from models import db, Course, Enrollment, Student
+
+
+def _course_with_students(app):
+    with app.app_context():
+        course = db.session.query(Course).join(Enrollment).group_by(Course.id).first()
+        students = [e.student_id for e in Enrollment.query.filter_by(course_id=course.id).limit(2)]
+        return course.id, course.teacher_id, students
+
+
+def test_zero_grade_is_shown_not_blank(app, client_as):
+    course_id, teacher_id, (student_id, _) = _course_with_students(app)
+    client = client_as(app, 'teacher', teacher_id)
+    assert client.put(f'/api/course/{course_id}/student/{student_id}/grade', json={'grade': 0}).status_code == 200
+
+    page = client.get(f'/professor/course/{course_id}').get_data(as_text=True)
+
+    assert f'id="grade-{student_id}"' in page
+    row = page[page.index(f'id="grade-{student_id}"'):]
+    assert row[:row.index('>')].endswith('value="0.0" style="width: 80px;"')
+
+
+def test_bulk_upload_reports_duplicate_students(app, client_as):
+    course_id, teacher_id, (first, second) = _course_with_students(app)
+    client = client_as(app, 'teacher', teacher_id)
+
+    response = client.put(f'/api/course/{course_id}/grades', json=[
+        {'studentId': first, 'grade': 81},
+        {'studentId': second, 'grade': 82},
+        {'studentId': first, 'grade': 99},
+    ])
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 2
+    assert response.json['errors'] == [{'row': 3, 'student_id': first, 'error': 'Student already given in row 1'}]
+    with app.app_context():
+        assert Enrollment.query.filter_by(course_id=course_id, student_id=first).one().grade == 81
+
+
+def test_single_grade_writes_reject_bad_grades(app, client_as):
+    course_id, teacher_id, (student_id, _) = _course_with_students(app)
+    with app.app_context():
+        enrollment = Enrollment.query.filter_by(course_id=course_id, student_id=student_id).first()
+        enrollment_id = enrollment.id
+        name = db.session.get(Student, student_id).name
+    teacher = client_as(app, 'teacher', teacher_id)
+    admin = client_as(app, 'admin', 1)
+
+    responses = [
+        teacher.put(f'/api/course/{course_id}/student/{student_id}/grade', json={'grade': 'abc'}),
+        admin.put(f'/api/admin/enrollments/{enrollment_id}', json={'grade': 'abc'}),
+        admin.put(f'/api/grades/{name}', json={'grade': 'abc'}),
+        admin.post('/api/grades', json={'name': name, 'grade': [90]}),
+    ]
+
+    assert [r.status_code for r in responses] == [400] * 4
+    assert all(r.json['error'] == 'Invalid grade' for r in responses)
+
+
+def test_stale_grade_write_gets_current_value(app, client_as):
+    course_id, teacher_id, (student_id, _) = _course_with_students(app)
+    client = client_as(app, 'teacher', teacher_id)
+    url = f'/api/course/{course_id}/student/{student_id}/grade'
+    version = client.put(url, json={'grade': 70}).json['version']
+
+    # Someone else saves first; our write still carries the version we read
+    saved = client.put(url, json={'grade': 85, 'version': version})
+    stale = client.put(url, json={'grade': 60, 'version': version})
+
+    assert saved.status_code == 200
+    assert stale.status_code == 409
+    assert stale.json['grade'] == 85
+    assert stale.json['version'] == saved.json['version']
+    with app.app_context():
+        assert Enrollment.query.filter_by(course_id=course_id, student_id=student_id).one().grade == 85
@@ -0,0 +1,39 @@
+import threading
+from sqlalchemy import event
+from metrics import _routes
+from models import db, Course, Enrollment
+
+
+def _statements_on_every_thread(app, fn):
+    """Run fn, counting the SQL statements any thread executes meanwhile"""
+    with app.app_context():
+        engine = db.engine
+    count = [0]
+    lock = threading.Lock()
+
+    def record(*args):
+        with lock:
+            count[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return count[0]
+
+
+def test_queued_writes_are_counted_for_their_request(app, client_as):
+    assert app.config['SQLITE_PROFILE'] == 'production'
+    with app.app_context():
+        enrollment = Enrollment.query.first()
+        course_id, student_id = enrollment.course_id, enrollment.student_id
+        teacher_id = db.session.get(Course, course_id).teacher_id
+    client = client_as(app, 'teacher', teacher_id)
+    before = _routes['main.update_grade'].sql_statements if 'main.update_grade' in _routes else 0
+
+    executed = _statements_on_every_thread(app, lambda: client.put(
+        f'/api/course/{course_id}/student/{student_id}/grade', json={'grade': 75}
+    ))
+
+    assert _routes['main.update_grade'].sql_statements - before == executed
@@ -0,0 +1,19 @@
+import pytest
+from query_plans import check_query_plans, plan_problems
+
+
+@pytest.fixture
+def plans(app):
+    with app.app_context():
+        return check_query_plans()
+
+
+def test_hot_queries_use_indexes(plans):
+    problems = {label: plan_problems(plan) for label, plan, ok in plans if not ok}
+    assert not problems
+
+
+def test_flags_scans_and_sorts():
+    assert plan_problems(['SCAN courses'])
+    assert plan_problems(['SEARCH courses USING INDEX ix_courses_name (name>?)', 'USE TEMP B-TREE FOR ORDER BY'])
+    assert not plan_problems(['SEARCH enrollments USING INDEX ix_enrollments_student_id (student_id=?)'])
@@ -0,0 +1,20 @@
+import json
+from models import Student
+from werkzeug.security import check_password_hash
+
+
+def test_roster_import_from_a_web_worker(make_app, client_as):
+    app = make_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000')
+    client = client_as(app, 'admin', 1)
+    csv = 'name,email,password\n' + ''.join(
+        f'Roster Student {i},roster{i}@example.edu,secret{i}\n' for i in range(40)
+    ) + 'No Email,,secret\n'
+
+    response = client.post('/api/admin/roster/students', data=csv, content_type='text/csv')
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1] == {'processed': 41, 'inserted': 40, 'failed': 1, 'done': True}
+    with app.app_context():
+        student = Student.query.filter_by(email='roster7@example.edu').one()
+        assert check_password_hash(student.password_hash, 'secret7')
@@ -0,0 +1,79 @@
+import json
+import time
+from models import db, Course
+from seat_events import seat_events
+
+
+def test_streams_capped_below_worker_threads(make_app, client_as):
+    app = make_app(WORKER_THREADS=8)
+    assert seat_events.max_clients == 2
+    clients = [client_as(app, 'student', i + 1) for i in range(3)]
+
+    streams = [clients[i].get('/api/seats/stream', buffered=False) for i in range(2)]
+    for stream in streams:
+        assert stream.status_code == 200
+        next(stream.response)  # the stream's first event
+
+    assert clients[2].get('/api/seats/stream').status_code == 503
+
+    for stream in streams:
+        stream.close()
+    assert seat_events.clients == 0
+
+
+def test_seat_counts_for_polling(app, client_as):
+    client = client_as(app, 'student', 1)
+    with app.app_context():
+        expected = {str(course_id): enrolled for course_id, enrolled in
+                    db.session.query(Course.id, Course.enrolled_count).filter(Course.id.in_([1, 2, 3]))}
+
+    response = client.get('/api/seats?ids=1,2,3')
+
+    assert response.status_code == 200
+    assert response.json['seats'] == expected
+    assert client.get('/api/seats?ids=1,x').status_code == 400
+
+
+def test_unread_streams_give_back_their_slot(make_app, client_as):
+    app = make_app(WORKER_THREADS=8)
+    client = client_as(app, 'student', 1)
+
+    for _ in range(3):
+        response = client.head('/api/seats/stream')
+        assert response.status_code == 200
+        response.close()  # as the server does once it has sent the headers
+    # Closed by the client before the first event was read
+    client.get('/api/seats/stream', buffered=False).close()
+
+    assert seat_events.clients == 0
+    stream = client.get('/api/seats/stream', buffered=False)
+    assert stream.status_code == 200
+    stream.close()
+    assert seat_events.clients == 0
+
+
+def _next_seat_event(stream):
+    """The payload of the next 'seats' event, skipping keepalives"""
+    for chunk in stream.response:
+        text = chunk.decode()
+        if 'event: seats' in text:
+            return json.loads(text.split('data: ', 1)[1].split('\n', 1)[0])
+
+
+def test_streams_report_counts_written_by_other_workers(make_app, client_as, enroll_from_another_worker):
+    app = make_app(SEAT_WATCH_SECONDS=0.05)
+    client = client_as(app, 'student', 1)
+    with app.app_context():
+        before = db.session.get(Course, 1).enrolled_count
+
+    stream = client.get('/api/seats/stream', buffered=False)
+    next(stream.response)
+    # Let the watcher take its first reading
+    deadline = time.monotonic() + 5
+    while seat_events._counts is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    enroll_from_another_worker(app, 1)
+
+    assert _next_seat_event(stream) == {'course_id': 1, 'enrolled': before + 1}
+    stream.close()
@@ -0,0 +1,37 @@
+from models import db, Course, Enrollment, ArchivedEnrollment, DEFAULT_TERM
+from terms import rollover_term, transcript
+
+
+def _close_term(app, term, next_term):
+    """Make next_term current, then roll term over"""
+    app.config['CURRENT_TERM'] = next_term
+    for _ in rollover_term(term, batch_size=50):
+        pass
+
+
+def test_back_to_back_rollovers(app):
+    with app.app_context():
+        first_term = Enrollment.query.count()
+        _close_term(app, DEFAULT_TERM, 'spring')
+        assert Enrollment.query.count() == 0
+
+        # Re-enrolling in an emptied table hands out the archived rows' ids again
+        db.session.query(Course).update({'term': 'spring'})
+        db.session.add_all([Enrollment(student_id=1, course_id=course_id, grade=80.0) for course_id in (1, 2, 3)])
+        db.session.commit()
+        assert {e.id for e in Enrollment.query} & {a.enrollment_id for a in ArchivedEnrollment.query}
+
+        _close_term(app, 'spring', 'summer')
+
+        assert Enrollment.query.count() == 0
+        assert ArchivedEnrollment.query.count() == first_term + 3
+        assert ArchivedEnrollment.query.filter_by(term='spring').count() == 3
+        assert {row['term'] for row in transcript(1)} >= {'spring'}
+
+
+def test_archive_keeps_enrollment_ids(app):
+    with app.app_context():
+        live = {(e.id, e.student_id, e.course_id, e.grade) for e in Enrollment.query}
+        _close_term(app, DEFAULT_TERM, 'spring')
+        archived = {(a.enrollment_id, a.student_id, a.course_id, a.grade) for a in ArchivedEnrollment.query}
+        assert archived == live
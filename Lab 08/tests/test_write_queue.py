@@ -0,0 +1,81 @@
+import threading
+from sqlalchemy import event
+from models import db, Course, Enrollment, Student
+
+# A pool smaller than the number of concurrent writers: the request threads
+# waiting on the write queue must not starve the writer thread of a connection
+SMALL_POOL = {'pool_size': 3, 'max_overflow': 0, 'pool_timeout': 2}
+CLIENTS = 8
+
+
+def _concurrently(fn, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        barrier.wait()
+        results[i] = fn(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_registrations_do_not_exhaust_pool(make_app, client_as):
+    app = make_app(enrollments=0, SQLALCHEMY_ENGINE_OPTIONS=dict(SMALL_POOL))
+    with app.app_context():
+        course_id = db.session.query(Course.id).order_by(Course.capacity.desc()).first()[0]
+    clients = [client_as(app, 'student', i + 1) for i in range(CLIENTS)]
+
+    responses = _concurrently(
+        lambda i: clients[i].post('/api/student/register', json={'courseId': course_id}), CLIENTS
+    )
+
+    assert [r.status_code for r in responses] == [200] * CLIENTS
+    with app.app_context():
+        assert db.session.get(Course, course_id).enrolled_count == CLIENTS
+
+
+def test_grade_writes_do_not_exhaust_pool(make_app, client_as):
+    app = make_app(enrollments=0, SQLALCHEMY_ENGINE_OPTIONS=dict(SMALL_POOL))
+    with app.app_context():
+        course = db.session.get(Course, 1)
+        teacher_id = course.teacher_id
+    for i in range(CLIENTS):
+        response = client_as(app, 'student', i + 1).post('/api/student/register', json={'courseId': 1})
+        assert response.status_code == 200
+    teacher = [client_as(app, 'teacher', teacher_id) for _ in range(CLIENTS)]
+
+    responses = _concurrently(
+        lambda i: teacher[i].put(f'/api/course/1/student/{i + 1}/grade', json={'grade': 90}), CLIENTS
+    )
+
+    assert [r.status_code for r in responses] == [200] * CLIENTS
+
+
+def test_single_writes_run_on_the_writer_thread(app, client_as):
+    with app.app_context():
+        engine = db.engine
+        enrollment = Enrollment.query.first()
+        enrollment_id, student = enrollment.id, db.session.get(Student, enrollment.student_id).name
+        other = Enrollment.query.filter(Enrollment.student_id != enrollment.student_id).first().id
+    admin = client_as(app, 'admin', 1)
+    writers = []
+
+    def record(conn, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writers.append(threading.current_thread().name)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        assert admin.put(f'/api/grades/{student}', json={'grade': 75}).status_code == 200
+        assert admin.delete(f'/api/grades/{student}').status_code == 200
+        assert admin.put(f'/api/admin/enrollments/{enrollment_id}', json={'grade': 80}).status_code == 200
+        assert admin.delete(f'/api/admin/enrollments/{other}').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert writers and set(writers) == {'sqlite-writer'}
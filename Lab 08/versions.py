@@ -0,0 +1,103 @@
+import hashlib
+from flask import Response, request
+from models import db, VersionStamp
+
+# VERSION STAMPS AND CONDITIONAL GET
+# Pages get an ETag built from a few counters in the version_stamps table:
+#   courses        any course or teacher detail changed
+#   seats          any enrollment was added or removed
+#   student:<id>   that student's enrollments or grades changed
+#   teacher:<id>   enrollments in that teacher's courses changed
+#   roster:<id>    that course's students, their names or grades changed
+# The counters are bumped by SQLite triggers, so every write path (routes,
+# bulk updates, Flask-Admin) keeps them current in the same transaction.
+# A revisit with a matching If-None-Match costs one query and gets a 304.
+# Roster stamps also version the cached roster tables (see template_cache.py).
+
+_BUMP = "INSERT INTO version_stamps (key, version) VALUES {} ON CONFLICT(key) DO UPDATE SET version = version + 1;"
+_BUMP_ROSTERS_OF = (
+    "INSERT INTO version_stamps (key, version) SELECT 'roster:' || course_id, 1 FROM enrollments "
+    "WHERE student_id = {} ON CONFLICT(key) DO UPDATE SET version = version + 1;"
+)
+_TEACHER_OF = "'teacher:' || COALESCE((SELECT teacher_id FROM courses WHERE id = {}.course_id), 0)"
+
+VERSION_TRIGGERS = {
+    'stamp_enrollment_insert': (
+        "AFTER INSERT ON enrollments",
+        _BUMP.format(f"('seats', 1), ('student:' || NEW.student_id, 1), ({_TEACHER_OF.format('NEW')}, 1)"),
+    ),
+    'stamp_enrollment_delete': (
+        "AFTER DELETE ON enrollments",
+        _BUMP.format(f"('seats', 1), ('student:' || OLD.student_id, 1), ({_TEACHER_OF.format('OLD')}, 1)"),
+    ),
+    'stamp_enrollment_move': (
+        "AFTER UPDATE OF student_id, course_id ON enrollments",
+        _BUMP.format(
+            f"('seats', 1), ('student:' || OLD.student_id, 1), ('student:' || NEW.student_id, 1), "
+            f"({_TEACHER_OF.format('OLD')}, 1), ({_TEACHER_OF.format('NEW')}, 1)"
+        ),
+    ),
+    'stamp_enrollment_grade': (
+        "AFTER UPDATE OF grade ON enrollments",
+        _BUMP.format("('student:' || NEW.student_id, 1)"),
+    ),
+    'stamp_course_insert': ("AFTER INSERT ON courses", _BUMP.format("('courses', 1)")),
+    'stamp_course_delete': ("AFTER DELETE ON courses", _BUMP.format("('courses', 1)")),
+    'stamp_course_update': (
+        "AFTER UPDATE OF name, description, capacity, teacher_id ON courses",
+        _BUMP.format("('courses', 1)"),
+    ),
+    'stamp_teacher_update': ("AFTER UPDATE OF name ON teachers", _BUMP.format("('courses', 1)")),
+    'stamp_teacher_delete': ("AFTER DELETE ON teachers", _BUMP.format("('courses', 1)")),
+    'stamp_student_update': (
+        "AFTER UPDATE OF name ON students",
+        _BUMP.format("('student:' || NEW.id, 1)"),
+    ),
+    'stamp_roster_insert': ("AFTER INSERT ON enrollments", _BUMP.format("('roster:' || NEW.course_id, 1)")),
+    'stamp_roster_delete': ("AFTER DELETE ON enrollments", _BUMP.format("('roster:' || OLD.course_id, 1)")),
+    'stamp_roster_move': (
+        "AFTER UPDATE OF student_id, course_id ON enrollments",
+        _BUMP.format("('roster:' || OLD.course_id, 1), ('roster:' || NEW.course_id, 1)"),
+    ),
+    'stamp_roster_grade': ("AFTER UPDATE OF grade ON enrollments", _BUMP.format("('roster:' || NEW.course_id, 1)")),
+    'stamp_roster_student': ("AFTER UPDATE OF name ON students", _BUMP_ROSTERS_OF.format('NEW.id')),
+}
+
+
+def read_stamps(*keys):
+    """{key: version} for the given version stamps (one query)"""
+    versions = dict(
+        db.session.query(VersionStamp.key, VersionStamp.version)
+        .filter(VersionStamp.key.in_(keys))
+    )
+    return {key: versions.get(key, 0) for key in keys}
+
+
+def page_etag(*keys, extra='', stamps=None):
+    """ETag for a page built from the given version stamps (one query, none
+    if stamps already holds them from read_stamps())"""
+    if stamps is None:
+        stamps = read_stamps(*keys)
+    raw = '|'.join(f'{key}={stamps[key]}' for key in keys) + f'|{extra}'
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def stamp_version(key):
+    """The current value of one version stamp (0 if it was never bumped)"""
+    return db.session.query(VersionStamp.version).filter_by(key=key).scalar() or 0
+
+
+def not_modified(etag):
+    """A 304 response if the client already has this version, otherwise None"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Tag a response so the browser revalidates it with If-None-Match"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,8 @@
+from app import create_app
+
+# Entry point for WSGI servers, e.g.
+#   gunicorn --preload -w 4 --threads 16 wsgi:app
+# Keep WORKER_THREADS equal to --threads: a quarter of each worker's threads
+# may serve live seat streams (see seat_events.py), the rest stay free for
+# ordinary requests. With gevent/eventlet workers raise SEAT_STREAM_MAX_CLIENTS.
+app = create_app()